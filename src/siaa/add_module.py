@@ -148,6 +148,10 @@ from framework.shared_utils import tokenize
 
 
 class {class_name}Actions(BaseActions):
+    # Índices e migrações versionadas: ver framework/base_actions.py
+    # Datas gravadas em AAAA-MM-DD (faixas pelo índice); exibir com to_br()
+    INDEXES = {{"idx_{name}_date": "date, time"}}
+
     def __init__(self, db_path: str):
         schema = (
             "id INTEGER PRIMARY KEY AUTOINCREMENT, "
@@ -161,9 +165,9 @@ class {class_name}Actions(BaseActions):
             f"Responda SOMENTE com o título, sem explicações.\\n"
             f"Mensagem: '{{message}}'"
         )
-        title = llm_func(prompt, fast=True).strip() or message[:40]
+        title = llm_func(prompt, fast=True, profile="extraction").strip() or message[:40]
         return {{
-            "date":     datetime.now().strftime("%d/%m/%Y"),
+            "date":     datetime.now().strftime("%Y-%m-%d"),
             "time":     datetime.now().strftime("%H:%M"),
             "title":    title,
             "keywords": ",".join(tokenize(title)),
@@ -181,6 +185,7 @@ class {class_name}Actions(BaseActions):
 
         _write(f"{base_dir}/entity.py", f"""
 from framework.base_entity import BaseEntity
+from framework.br_parser import to_br
 from modules.{name}.actions import {class_name}Actions
 
 
@@ -239,7 +244,7 @@ class {class_name}Entity(BaseEntity):
                 items = self.actions.list_all(limit=10)
                 if not items:
                     return "📭 Lista vazia.", True
-                lista = "\\n".join([f"• {{r['date']}} — {{r['title']}}" for r in reversed(items)])
+                lista = "\\n".join([f"• {{to_br(r['date'])}} — {{r['title']}}" for r in reversed(items)])
                 return f"📋 *{class_name}:*\\n{{lista}}", True
 
             return "Desculpe, não entendi o que fazer.", True
@@ -29,8 +29,14 @@ TIMEOUT = int(os.getenv("SESSION_TIMEOUT", 300))
 print("🔄 Inicializando Memória e Configurações...")
 memory = MemoryManager()
 
-print("📚 Consolidando Memória de Médio Prazo (Broader Context)...")
-memory.run_maintenance()
+print("🔥 Pré-carregando modelos no Ollama (background)...")
+memory.warm_up()
+
+print("🧠 Iniciando pipeline de memória (background)...")
+memory.start_pipeline()
+
+print("📚 Agendando consolidação do Broader Context (background)...")
+memory.start_maintenance()
 
 print("🤖 Inicializando Agente Principal...")
 agent = CynbotAgent(memory)
@@ -72,6 +78,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         print("🚫 Não autorizado.")
         return
 
+    # Libera o Ollama para este turno: background na fila aguarda
+    memory.notify_user_activity()
+
     now     = time.time()
     elapsed = now - session["last_time"]
 
@@ -121,6 +130,7 @@ async def handle_audio(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     print(f"\n{'='*55}")
     print("🎤 Áudio recebido.")
+    memory.notify_user_activity()
     await handle_voice(update, context, agent, session, memory)
 
 
@@ -25,12 +25,15 @@ class CynbotAgent:
 
         try:
             # "💬 Lendo mensagem..." já foi setado pelo app.py antes de chamar process.
-            # Damos 0.5s pra ele ser visto antes de mudar.
-            time.sleep(0.5)
+            # Damos 0.5s pra ele ser visto antes de mudar — só quando há status
+            # na tela (sem set_status, ex: benchmark, não há o que exibir).
+            if set_status:
+                time.sleep(0.5)
 
             # Fase 1 — SVM classifica a intenção (ms)
             _status("🧠 Pensando...")
-            time.sleep(0.8)  # mínimo visível antes do SVM retornar e ir pro próximo
+            if set_status:
+                time.sleep(0.8)  # mínimo visível antes do SVM retornar e ir pro próximo
             intent = self.handler.classify(message)
 
             # Fase 2 — executa o módulo (pode chamar LLM, API, etc.)
@@ -0,0 +1,46 @@
+"""
+generation_profiles.py — Opções de geração por tipo de chamada ao LLM.
+
+Antes todo _llm saía com temperature 0.3 e sem limite de saída, fosse
+uma resposta de chat ou um fato de uma linha. Cada call site agora
+declara um perfil; o perfil define temperatura, teto de tokens gerados
+(num_predict) e stop tokens — tarefas curtas param cedo.
+
+num_ctx NÃO varia por perfil: o Ollama recarrega o modelo (e descarta
+o KV cache) toda vez que o num_ctx de um modelo muda entre chamadas.
+Por isso é um valor por modelo (OLLAMA_NUM_CTX / config ollama.num_ctx),
+aplicado igualmente a todos os perfis e ao preload do ModelWarmup.
+
+Perfis podem ser ajustados no config.json em ollama.profiles, ex:
+    "profiles": {"chat": {"num_predict": 512}}
+"""
+
+# "{bot}" é trocado pelo nome do bot
+_DIALOG_STOPS = ["\nUsuário:", "\n{bot}:", "\nUser:"]
+
+PROFILES = {
+    # Resposta ao usuário (ChatEntity)
+    "chat":       {"temperature": 0.3, "num_predict": 384, "stop": _DIALOG_STOPS},
+    # Resposta sobre registros antigos (MemoryEntity)
+    "memory":     {"temperature": 0.3, "num_predict": 256, "stop": _DIALOG_STOPS},
+    # JSON estruturado (finanças, agenda) — ver _llm_json
+    "extraction": {"temperature": 0.0, "num_predict": 128},
+    # Fatos do actual_context (até um lote do MemoryPipeline, 1 linha cada)
+    "fact":       {"temperature": 0.2, "num_predict": 200, "stop": ["\n\n"]},
+    # Condensar actual_context / broader_context
+    "compaction": {"temperature": 0.2, "num_predict": 256},
+}
+
+DEFAULT_PROFILE = "chat"
+
+
+def resolve(profile: str, bot_name: str, num_ctx: int | None = None, overrides: dict | None = None) -> dict:
+    """Monta o 'options' do /api/generate para o perfil pedido."""
+    base    = PROFILES.get(profile, PROFILES[DEFAULT_PROFILE])
+    options = dict(base, **(overrides or {}).get(profile, {}))
+
+    if "stop" in options:
+        options["stop"] = [s.replace("{bot}", bot_name) for s in options["stop"]]
+    if num_ctx:
+        options["num_ctx"] = num_ctx
+    return options
@@ -0,0 +1,186 @@
+"""
+llm_router.py — Pool de backends Ollama com health check e circuit breaker.
+
+Com um único OLLAMA_URL, um Ollama fora do ar faz cada mensagem esperar
+o timeout inteiro. Aqui:
+
+  1. OLLAMA_URLS aceita vários endpoints (vírgula) — ex: o Ollama do
+     compose + um stand-in local. Sem ele, usa só o OLLAMA_URL.
+  2. Uma thread faz health check (GET /api/tags) e mede a latência.
+  3. Cada backend tem um circuit breaker: N falhas seguidas → aberto
+     (ignorado) por um cooldown → meio-aberto (uma tentativa) → fechado.
+  4. O request vai para o backend saudável mais rápido e, se a conexão
+     falhar, cai no próximo na hora (connect timeout curto).
+"""
+
+import threading
+import time
+
+import requests
+
+
+class NoBackendAvailable(requests.exceptions.ConnectionError):
+    """Todos os backends estão com o circuito aberto."""
+
+
+class LLMBackend:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, base_url: str):
+        self.base_url  = base_url
+        self.state     = self.CLOSED
+        self.failures  = 0
+        self.opened_at = 0.0
+        self.latency   = None   # EWMA (s) do health check
+        self.in_flight = 0
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def score(self) -> float:
+        """Menor é melhor: latência ponderada pela carga atual."""
+        base = self.latency if self.latency is not None else 1.0
+        return base * (1 + self.in_flight)
+
+    def __repr__(self):
+        return f"<LLMBackend {self.base_url} {self.state}>"
+
+
+class LLMRouter:
+    def __init__(
+        self,
+        base_urls: list[str],
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        health_interval: float = 30.0,
+        connect_timeout: float = 3.0,
+    ):
+        self.backends          = [LLMBackend(u) for u in dict.fromkeys(base_urls)]
+        self.failure_threshold = failure_threshold
+        self.cooldown          = cooldown
+        self.health_interval   = health_interval
+        self.connect_timeout   = connect_timeout
+
+        self._lock   = threading.Lock()
+        self._stop   = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Circuit breaker
+    # ------------------------------------------------------------------
+
+    def _available(self, b: LLMBackend, now: float) -> bool:
+        if b.state == LLMBackend.OPEN and now - b.opened_at >= self.cooldown:
+            b.state = LLMBackend.HALF_OPEN
+        return b.state != LLMBackend.OPEN
+
+    def _record_success(self, b: LLMBackend):
+        with self._lock:
+            if b.state != LLMBackend.CLOSED:
+                print(f"✅ [LLMRouter] {b.base_url} de volta — circuito fechado.")
+            b.state    = LLMBackend.CLOSED
+            b.failures = 0
+
+    def _record_failure(self, b: LLMBackend):
+        with self._lock:
+            b.failures += 1
+            if b.state == LLMBackend.HALF_OPEN or b.failures >= self.failure_threshold:
+                if b.state != LLMBackend.OPEN:
+                    print(f"🔌 [LLMRouter] {b.base_url} falhou {b.failures}x — circuito aberto por {self.cooldown:.0f}s.")
+                b.state     = LLMBackend.OPEN
+                b.opened_at = time.time()
+
+    def candidates(self) -> list[LLMBackend]:
+        """Backends disponíveis, do melhor para o pior."""
+        now = time.time()
+        with self._lock:
+            ready = [b for b in self.backends if self._available(b, now)]
+            return sorted(ready, key=lambda b: (b.state != LLMBackend.CLOSED, b.score()))
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def post(self, path: str, payload: dict, timeout: float = 180, **kwargs):
+        """
+        POST no melhor backend com failover. Retorna (response, backend).
+        Erros de conexão/timeout e HTTP 5xx passam para o próximo backend;
+        4xx é erro do pedido e sobe direto.
+        """
+        candidates = self.candidates()
+        if not candidates:
+            raise NoBackendAvailable("Nenhum backend do Ollama disponível (circuitos abertos).")
+
+        last_error = None
+        for b in candidates:
+            with self._lock:
+                b.in_flight += 1
+            try:
+                r = requests.post(
+                    b.url(path), json=payload,
+                    timeout=(self.connect_timeout, timeout), **kwargs,
+                )
+                if r.status_code >= 500:
+                    r.raise_for_status()
+                self._record_success(b)
+                return r, b
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.HTTPError) as e:
+                print(f"⚠️  [LLMRouter] {b.base_url} falhou ({type(e).__name__}) — tentando o próximo.")
+                self._record_failure(b)
+                last_error = e
+            finally:
+                with self._lock:
+                    b.in_flight -= 1
+
+        raise last_error
+
+    # ------------------------------------------------------------------
+    # Health check
+    # ------------------------------------------------------------------
+
+    def check(self, b: LLMBackend) -> bool:
+        start = time.time()
+        try:
+            r = requests.get(b.url("/api/tags"), timeout=self.connect_timeout)
+            r.raise_for_status()
+        except requests.exceptions.RequestException:
+            self._record_failure(b)
+            return False
+
+        elapsed = time.time() - start
+        with self._lock:
+            b.latency = elapsed if b.latency is None else 0.7 * b.latency + 0.3 * elapsed
+        self._record_success(b)
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            for b in self.backends:
+                self.check(b)
+            self._stop.wait(self.health_interval)
+
+    def start(self):
+        """Health checks periódicos em thread daemon."""
+        if self.health_interval <= 0:
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name="siaa-llm-router", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "url":       b.base_url,
+                    "state":     b.state,
+                    "failures":  b.failures,
+                    "latency_s": round(b.latency, 3) if b.latency is not None else None,
+                }
+                for b in self.backends
+            ]
@@ -0,0 +1,101 @@
+"""
+llm_scheduler.py — Fila de prioridade para as chamadas ao Ollama.
+
+Um Ollama pequeno atende poucas requisições ao mesmo tempo
+(OLLAMA_NUM_PARALLEL). Sem fila, a extração de fatos da memória e a
+consolidação do broader context disputam o modelo de igual para igual
+com a resposta que o usuário está esperando.
+
+Classes de prioridade (menor = mais urgente):
+  interactive → respostas ao usuário (chat, extrações do turno atual)
+  extraction  → fatos/compactação da memória após fechar um turno
+  background  → consolidação de longo prazo, manutenção
+
+Quando chega mensagem do usuário, o trabalho de background ainda na fila
+fica retido por alguns segundos, liberando o modelo para o turno que
+está começando. Chamadas já em execução não são interrompidas.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+
+PRIORITIES = {
+    "interactive": 0,
+    "extraction":  1,
+    "background":  2,
+}
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrent: int = 1, background_hold: float = 10.0):
+        self.max_concurrent  = max(1, max_concurrent)
+        self.background_hold = background_hold
+
+        self._cond       = threading.Condition()
+        self._queue      = []  # heap de (prioridade, seq)
+        self._seq        = itertools.count()
+        self._running    = 0
+        self._hold_until = 0.0
+        self._stats      = {name: 0 for name in PRIORITIES}
+        self._stats["held"] = 0
+
+    # ------------------------------------------------------------------
+    # Sinais externos
+    # ------------------------------------------------------------------
+
+    def notify_user_activity(self):
+        """Chamado pelo app.py quando chega mensagem: segura o background."""
+        with self._cond:
+            self._hold_until = time.time() + self.background_hold
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Fila
+    # ------------------------------------------------------------------
+
+    def _can_run(self, entry: tuple, now: float) -> bool:
+        if self._running >= self.max_concurrent or self._queue[0] != entry:
+            return False
+        return entry[0] < PRIORITIES["background"] or now >= self._hold_until
+
+    @contextmanager
+    def slot(self, priority: str = "interactive"):
+        """Bloqueia até haver vaga para a prioridade pedida."""
+        level = PRIORITIES.get(priority, PRIORITIES["interactive"])
+        entry = (level, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            held = False
+            while True:
+                now = time.time()
+                if self._can_run(entry, now):
+                    break
+                timeout = None
+                if level >= PRIORITIES["background"] and now < self._hold_until:
+                    if not held:
+                        held = True
+                        self._stats["held"] += 1
+                        print(f"⏸️  [LLMScheduler] Background retido — usuário ativo.")
+                    timeout = self._hold_until - now
+                self._cond.wait(timeout)
+
+            heapq.heappop(self._queue)
+            self._running += 1
+            self._stats[priority if priority in PRIORITIES else "interactive"] += 1
+            self._cond.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return dict(self._stats, queued=len(self._queue), running=self._running)
@@ -0,0 +1,234 @@
+"""
+llm_telemetry.py — Registro de cada chamada ao LLM.
+
+O Ollama devolve os tempos e contagens de tokens de cada geração
+(prompt_eval_count, eval_count, load_duration, ... em nanossegundos),
+que antes eram descartados. Aqui cada chamada vira uma linha na tabela
+'llm_calls' (siaa.db) com:
+
+  call_site   → quem pediu (ex: finance.actions:extract_and_prepare)
+  tokens      → prompt avaliado / gerado (prompt_estimated=1: stream
+                cortado cedo, sem as métricas do Ollama — contagem estimada)
+  tempos (ms) → load, prompt_eval, eval, total
+  cache       → 'kv' (context reaproveitado), 'coalesced' (single-flight)
+  outcome     → ok | error | coalesced
+
+As linhas ficam num buffer em memória e vão para o SQLite em lote, fora
+do caminho da resposta. A tabela é circular: só as últimas MAX_ROWS
+chamadas são mantidas.
+
+Resumo:  python -m core.llm_telemetry   (ou 'make llm-stats') — por
+call_site e a latência fria (modelo carregado na chamada) × quente.
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from core.model_warmup import COLD_LOAD_THRESHOLD_S
+from framework import db
+from framework.base_actions import BaseActions
+
+
+_NS_PER_MS = 1_000_000
+_ROOT      = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Arquivos de infraestrutura ignorados ao descobrir o call_site
+_INFRA_FILES = (
+    os.path.join("core", "memory_manager.py"),
+    os.path.join("core", "memory_pipeline.py"),
+    os.path.join("core", "single_flight.py"),
+    os.path.join("core", "llm_telemetry.py"),
+    "functools.py",
+)
+
+
+def call_site(skip: int = 1) -> str:
+    """Primeiro frame fora da infraestrutura de LLM: 'modulo.arquivo:funcao'."""
+    frame = sys._getframe(skip)
+    while frame:
+        path = frame.f_code.co_filename
+        if not path.endswith(_INFRA_FILES):
+            rel  = os.path.splitext(os.path.relpath(path, _ROOT))[0]
+            name = rel.replace(os.sep, ".").removeprefix("modules.")
+            return f"{name}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+class LLMTelemetry(BaseActions):
+    MAX_ROWS    = 20000
+    FLUSH_EVERY = 20      # linhas no buffer
+    FLUSH_AFTER = 30.0    # segundos desde o último flush
+
+    # summary(hours) filtra por ts
+    INDEXES    = {"idx_llm_calls_ts": "ts"}
+    MIGRATIONS = [(1, "ALTER TABLE llm_calls ADD COLUMN prompt_estimated INTEGER DEFAULT 0")]
+
+    def __init__(self, db_path: str):
+        schema = (
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "ts TEXT, call_site TEXT, model TEXT, priority TEXT, backend TEXT, "
+            "prompt_tokens INTEGER, eval_tokens INTEGER, "
+            "load_ms REAL, prompt_eval_ms REAL, eval_ms REAL, total_ms REAL, "
+            "cache TEXT, outcome TEXT, prompt_estimated INTEGER DEFAULT 0"
+        )
+        super().__init__(db_path, "llm_calls", schema)
+
+        self._buffer     = []
+        self._lock       = threading.Lock()
+        self._last_flush = time.time()
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    def record(
+        self, call_site: str, model: str, priority: str, outcome: str,
+        data: dict | None = None, backend: str = "", cache: str = "",
+        elapsed: float = 0.0,
+    ):
+        """data: JSON cru do /api/generate (tempos em ns)."""
+        data = data or {}
+        row  = (
+            datetime.now().isoformat(timespec="seconds"),
+            call_site, model, priority, backend,
+            data.get("prompt_eval_count", 0),
+            data.get("eval_count", 0),
+            data.get("load_duration", 0) / _NS_PER_MS,
+            data.get("prompt_eval_duration", 0) / _NS_PER_MS,
+            data.get("eval_duration", 0) / _NS_PER_MS,
+            data.get("total_duration", 0) / _NS_PER_MS or elapsed * 1000,
+            cache, outcome, int(bool(data.get("prompt_eval_estimated"))),
+        )
+        with self._lock:
+            self._buffer.append(row)
+            due = (
+                len(self._buffer) >= self.FLUSH_EVERY
+                or time.time() - self._last_flush >= self.FLUSH_AFTER
+            )
+        if due:
+            threading.Thread(target=self.flush, name="siaa-telemetry", daemon=True).start()
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._last_flush   = time.time()
+        if not rows:
+            return
+        try:
+            with db.connect(self.db_path) as conn:
+                conn.executemany(
+                    "INSERT INTO llm_calls (ts, call_site, model, priority, backend, "
+                    "prompt_tokens, eval_tokens, load_ms, prompt_eval_ms, eval_ms, "
+                    "total_ms, cache, outcome, prompt_estimated) "
+                    "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                    rows,
+                )
+                conn.execute(
+                    "DELETE FROM llm_calls WHERE id <= (SELECT MAX(id) FROM llm_calls) - ?",
+                    (self.MAX_ROWS,),
+                )
+        except Exception as e:
+            print(f"❌ LLMTelemetry.flush: {e}")
+
+    # ------------------------------------------------------------------
+    # Resumo
+    # ------------------------------------------------------------------
+
+    def summary(self, hours: float = 24) -> list[dict]:
+        """Agregado por call_site nas últimas 'hours' horas, do mais caro ao mais barato."""
+        self.flush()
+        since = (datetime.now() - timedelta(hours=hours)).isoformat(timespec="seconds")
+        try:
+            with db.connect(self.db_path) as conn:
+                rows = db.dict_cursor(conn).execute(
+                    """
+                    SELECT call_site,
+                           COUNT(*)                                 AS calls,
+                           SUM(outcome = 'error')                   AS errors,
+                           SUM(cache != '')                         AS cached,
+                           SUM(prompt_tokens)                       AS prompt_tokens,
+                           SUM(prompt_estimated)                    AS estimated,
+                           SUM(eval_tokens)                         AS eval_tokens,
+                           ROUND(AVG(total_ms))                     AS avg_ms,
+                           ROUND(MAX(total_ms))                     AS max_ms,
+                           ROUND(SUM(load_ms))                      AS load_ms
+                    FROM llm_calls
+                    WHERE ts >= ?
+                    GROUP BY call_site
+                    ORDER BY SUM(prompt_tokens + eval_tokens) DESC
+                    """,
+                    (since,),
+                ).fetchall()
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"❌ LLMTelemetry.summary: {e}")
+            return []
+
+    def latency_split(self, hours: float = 24) -> dict:
+        """
+        {'cold': {'calls', 'avg_ms', 'max_ms'}, 'warm': {...}} das chamadas
+        respondidas: fria quando o Ollama precisou carregar o modelo. Streams
+        cortados (early_stop) ficam de fora — não trazem load_duration.
+        """
+        self.flush()
+        since = (datetime.now() - timedelta(hours=hours)).isoformat(timespec="seconds")
+        split = {kind: {"calls": 0, "avg_ms": 0.0, "max_ms": 0.0} for kind in ("cold", "warm")}
+        try:
+            with db.connect(self.db_path) as conn:
+                rows = conn.execute(
+                    """
+                    SELECT CASE WHEN load_ms > ? THEN 'cold' ELSE 'warm' END AS kind,
+                           COUNT(*), ROUND(AVG(total_ms)), ROUND(MAX(total_ms))
+                    FROM llm_calls
+                    WHERE ts >= ? AND outcome = 'ok'
+                    GROUP BY kind
+                    """,
+                    (COLD_LOAD_THRESHOLD_S * 1000, since),
+                ).fetchall()
+        except Exception as e:
+            print(f"❌ LLMTelemetry.latency_split: {e}")
+            return split
+        for kind, calls, avg_ms, max_ms in rows:
+            split[kind] = {"calls": calls, "avg_ms": avg_ms, "max_ms": max_ms}
+        return split
+
+    def format_summary(self, hours: float = 24) -> str:
+        rows = self.summary(hours)
+        if not rows:
+            return f"📭 Nenhuma chamada ao LLM nas últimas {hours:g}h."
+
+        lines = [
+            f"📊 Chamadas ao LLM — últimas {hours:g}h",
+            f"{'call_site':<42} {'n':>5} {'err':>4} {'cache':>5} "
+            f"{'tok_in':>8} {'tok_out':>8} {'avg_ms':>8} {'max_ms':>8}",
+        ]
+        for r in rows:
+            # "~": parte do tok_in é estimada (streams cortados no early_stop)
+            tok_in = f"{'~' if r['estimated'] else ''}{r['prompt_tokens']}"
+            lines.append(
+                f"{r['call_site'][:42]:<42} {r['calls']:>5} {r['errors']:>4} {r['cached']:>5} "
+                f"{tok_in:>8} {r['eval_tokens']:>8} {r['avg_ms']:>8.0f} {r['max_ms']:>8.0f}"
+            )
+        total_in  = sum(r["prompt_tokens"] for r in rows)
+        total_out = sum(r["eval_tokens"] for r in rows)
+        lines.append(f"Total: {sum(r['calls'] for r in rows)} chamadas | {total_in} tokens in | {total_out} tokens out")
+        if any(r["estimated"] for r in rows):
+            lines.append("~ tok_in inclui estimativa de chamadas com early_stop (sem métricas do Ollama)")
+
+        split = self.latency_split(hours)
+        lines.append(" | ".join(
+            f"{label}: {split[kind]['calls']} chamadas, avg {split[kind]['avg_ms']:.0f} ms, "
+            f"máx {split[kind]['max_ms']:.0f} ms"
+            for kind, label in (("cold", "Frias (modelo carregado)"), ("warm", "Quentes"))
+        ))
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    data_dir = os.getenv("SIAA_DATA_DIR", "/siaa-data")
+    hours    = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    print(LLMTelemetry(os.path.join(data_dir, "siaa.db")).format_summary(hours))
@@ -0,0 +1,226 @@
+"""
+memory_archive.py — Arquivo frio do long_term (partições mensais comprimidas).
+
+O long_term crescia para sempre dentro do siaa.db, junto com as tabelas
+que o bot consulta a cada mensagem. Agora as interações com mais de
+MEMORY_HOT_DAYS dias (padrão 90) saem do banco quente para um arquivo
+SQLite por mês:
+
+  <data_dir>/archive/long_term_AAAA-MM.db
+    long_term      → mesmo id/date/time/intent; content comprimido
+                     (zstd se o pacote 'zstandard' estiver instalado,
+                     senão zlib — o codec fica gravado em cada linha)
+    long_term_fts  → FTS5 sem conteúdo (contentless): só o índice, o
+                     texto fica apenas na versão comprimida
+
+  - Só sai do banco quente o dia que já tem resumo na SummaryTree
+    (os resumos de período continuam cobrindo o histórico inteiro)
+  - Cópia primeiro, remoção depois: INSERT OR IGNORE pelo id original
+    torna a rodada idempotente se o processo cair entre as duas etapas
+  - A busca só abre os arquivos quando a consulta cita um período
+    anterior ao corte (MemoryManager.search_long_term), e só os meses
+    desse período
+"""
+
+import os
+import re
+import sqlite3
+import zlib
+from datetime import datetime, timedelta
+
+from framework import db
+
+try:
+    import zstandard
+except ImportError:  # sem o pacote: zlib da stdlib
+    zstandard = None
+
+
+_MONTH_FILE_RE = re.compile(r"^long_term_(\d{4}-\d{2})\.db$")
+
+
+class MemoryArchive:
+    BATCH = 500
+
+    def __init__(self, memory, hot_days: int = 90):
+        self.mem      = memory
+        self.hot_days = hot_days
+        self.dir      = os.path.join(memory.data_dir, "archive")
+        self.codec    = "zstd" if zstandard else "zlib"
+        self.fts      = True
+        os.makedirs(self.dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Compressão
+    # ------------------------------------------------------------------
+
+    def _compress(self, text: str) -> bytes:
+        data = text.encode("utf-8")
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=9).compress(data)
+        return zlib.compress(data, 9)
+
+    @staticmethod
+    def _decompress(blob: bytes, codec: str) -> str:
+        if codec == "zstd":
+            if zstandard is None:
+                return "[arquivado em zstd — instale 'zstandard' para ler]"
+            return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+        return zlib.decompress(blob).decode("utf-8")
+
+    # ------------------------------------------------------------------
+    # Partições
+    # ------------------------------------------------------------------
+
+    def months(self) -> list[str]:
+        """Meses arquivados, do mais novo ao mais antigo."""
+        found = (_MONTH_FILE_RE.match(f) for f in os.listdir(self.dir))
+        return sorted((m.group(1) for m in found if m), reverse=True)
+
+    def _connect(self, month: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(os.path.join(self.dir, f"long_term_{month}.db"))
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS long_term (
+                id INTEGER PRIMARY KEY, date TEXT, time TEXT, intent TEXT,
+                content BLOB, codec TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_long_term_date ON long_term(date, time);
+        """)
+        if self.fts:
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS long_term_fts USING fts5("
+                    "content, content='', tokenize='unicode61 remove_diacritics 2')"
+                )
+            except sqlite3.OperationalError as e:
+                print(f"⚠️  [MemoryArchive] FTS5 indisponível ({e}) — busca por varredura.")
+                self.fts = False
+        return conn
+
+    # ------------------------------------------------------------------
+    # Arquivamento
+    # ------------------------------------------------------------------
+
+    def cutoff(self, now: datetime = None) -> str:
+        """Primeiro dia (AAAA-MM-DD) que continua no banco quente."""
+        return ((now or datetime.now()) - timedelta(days=self.hot_days)).strftime("%Y-%m-%d")
+
+    def archive(self, now: datetime = None) -> int:
+        """Move do banco quente as interações anteriores ao corte. Retorna quantas."""
+        if self.hot_days <= 0:
+            return 0
+
+        cutoff, total = self.cutoff(now), 0
+        try:
+            while True:
+                with db.connect(self.mem.db_path) as hot:
+                    rows = hot.execute(
+                        "SELECT id, date, time, intent, content FROM long_term "
+                        "WHERE date < ? AND date IN "
+                        "(SELECT period FROM memory_summaries WHERE level = 'day') "
+                        "ORDER BY id LIMIT ?",
+                        (cutoff, self.BATCH),
+                    ).fetchall()
+                if not rows:
+                    break
+
+                by_month = {}
+                for row in rows:
+                    by_month.setdefault(row[1][:7], []).append(row)
+                for month, items in by_month.items():
+                    with self._connect(month) as conn:
+                        for id_, date, time_, intent, content in items:
+                            cur = conn.execute(
+                                "INSERT OR IGNORE INTO long_term "
+                                "(id, date, time, intent, content, codec) VALUES (?, ?, ?, ?, ?, ?)",
+                                (id_, date, time_, intent, self._compress(content or ""), self.codec),
+                            )
+                            if cur.rowcount and self.fts:
+                                conn.execute(
+                                    "INSERT INTO long_term_fts(rowid, content) VALUES (?, ?)",
+                                    (id_, content or ""),
+                                )
+                    conn.close()
+
+                ids = [r[0] for r in rows]
+                with db.connect(self.mem.db_path) as hot:
+                    hot.execute(
+                        f"DELETE FROM long_term WHERE id IN ({', '.join('?' * len(ids))})", ids
+                    )
+                total += len(ids)
+        except Exception as e:
+            print(f"⚠️  [MemoryArchive] Falha ao arquivar: {e}")
+
+        if total:
+            print(f"🧊 [MemoryArchive] {total} interação(ões) anteriores a {cutoff} arquivada(s) ({self.codec}).")
+        return total
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def search(self, match: str | None, terms: list[str], date_from: str, date_to: str, limit: int) -> list[str]:
+        """
+        Linhas '[date time] content' dos meses arquivados em [date_from, date_to].
+        match: expressão FTS5 (ChatActions.fts_query); None = só o período.
+        """
+        lines = []
+        for month in self.months():
+            if len(lines) >= limit:
+                break
+            if not date_from[:7] <= month <= date_to[:7]:
+                continue
+            try:
+                conn = self._connect(month)
+                with conn:
+                    if match and self.fts:
+                        rows = conn.execute(
+                            "SELECT l.date, l.time, l.content, l.codec FROM long_term_fts f "
+                            "JOIN long_term l ON l.id = f.rowid "
+                            "WHERE long_term_fts MATCH ? AND l.date BETWEEN ? AND ? "
+                            "ORDER BY bm25(long_term_fts) LIMIT ?",
+                            (match, date_from, date_to, limit - len(lines)),
+                        ).fetchall()
+                    else:
+                        rows = conn.execute(
+                            "SELECT date, time, content, codec FROM long_term "
+                            "WHERE date BETWEEN ? AND ? ORDER BY date DESC, time DESC",
+                            (date_from, date_to),
+                        ).fetchall()
+                conn.close()
+            except Exception as e:
+                print(f"⚠️  [MemoryArchive] Busca em {month}: {e}")
+                continue
+
+            for date, time_, blob, codec in rows:
+                content = self._decompress(blob, codec)
+                # Sem FTS5: filtra os termos aqui, como o LIKE do banco quente
+                if match and not self.fts and not any(t in content.lower() for t in terms):
+                    continue
+                lines.append(f"[{date} {time_}] {content}")
+                if len(lines) >= limit:
+                    break
+        return lines
+
+    def fetch(self, ids: list[int]) -> dict[int, tuple[str, str, str]]:
+        """{id: (date, time, content)} das linhas arquivadas (hits do VectorMemory)."""
+        found, missing = {}, set(ids)
+        for month in self.months():
+            if not missing:
+                break
+            try:
+                conn = self._connect(month)
+                with conn:
+                    rows = conn.execute(
+                        f"SELECT id, date, time, content, codec FROM long_term "
+                        f"WHERE id IN ({', '.join('?' * len(missing))})",
+                        list(missing),
+                    ).fetchall()
+                conn.close()
+            except Exception as e:
+                print(f"⚠️  [MemoryArchive] Leitura de {month}: {e}")
+                continue
+            for id_, date, time_, blob, codec in rows:
+                found[id_] = (date, time_, self._decompress(blob, codec))
+                missing.discard(id_)
+        return found
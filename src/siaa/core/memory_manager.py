@@ -1,9 +1,28 @@
 import os
 import json
 import re
+import threading
+import time
+
 import requests
 
+from core import generation_profiles
+from core.llm_router import LLMRouter
+from core.llm_telemetry import LLMTelemetry, call_site
+from core.llm_scheduler import LLMScheduler
+from core.memory_archive import MemoryArchive
+from core.memory_pipeline import MemoryPipeline, MemoryStateActions
+from core.memory_summaries import SummaryTree
+from core.model_warmup import ModelWarmup
+from core.single_flight import SingleFlight
+from core.vector_memory import VectorMemory
+from core import structured_output
 from core.situational_context import get_situational_context
+from framework import db
+from framework.prompt_builder import (
+    PromptBuilder, configure as configure_window, counter as token_counter,
+)
+
 
 class MemoryManager:
     """
@@ -31,6 +50,49 @@ class MemoryManager:
         }
         self._init_files()
 
+        # Cache das camadas: {layer: ((mtime_ns, tamanho), bloco renderizado)}
+        self._layer_cache = {}
+
+        # Contagem de tokens calibrada pelas respostas do Ollama
+        self.tokens = token_counter
+        configure_window(self._num_ctx())
+
+        self.router    = LLMRouter(
+            self._ollama_urls(),
+            health_interval=float(self.config.get("ollama", {}).get("health_interval", 30)),
+        )
+        self.flight    = SingleFlight()
+        self.scheduler = LLMScheduler(
+            max_concurrent=int(os.getenv(
+                "OLLAMA_NUM_PARALLEL",
+                self.config.get("ollama", {}).get("num_parallel", 1),
+            )),
+        )
+        self.warmup = ModelWarmup(
+            lambda: [b.url("/api/generate") for b in self.router.candidates()],
+            [self._model(fast=False), self._model(fast=True)],
+            self._keep_alive_config(),
+            options={"num_ctx": self._num_ctx()},
+            interval=int(os.getenv(
+                "OLLAMA_KEEP_WARM_INTERVAL",
+                self.config.get("ollama", {}).get("keep_warm_interval", 600),
+            )),
+        )
+
+        self.pipeline  = MemoryPipeline(self)
+        self.state     = MemoryStateActions(self.db_path)
+        self.summaries = SummaryTree(self)
+        self.archive   = MemoryArchive(self, hot_days=int(os.getenv(
+            "MEMORY_HOT_DAYS", self.config["memory_limits"].get("hot_days", 90),
+        )))
+        self._maintenance_stop   = threading.Event()
+        self._maintenance_thread = None
+        self.telemetry = LLMTelemetry(self.db_path)
+        self.vectors   = VectorMemory(
+            self,
+            os.getenv("OLLAMA_MODEL_EMBED", self.config.get("ollama", {}).get("model_embed", "nomic-embed-text")),
+        )
+
     def _load_config(self) -> dict:
         """Carrega o config.json ou cria um padrão se não existir."""
         if not os.path.exists(self.config_path):
@@ -38,12 +100,19 @@ class MemoryManager:
                 "bot_info": {"name": "Siaa", "user_name": "Usuário", "version": "1.0.0"},
                 "ollama": {
                     "url": "http://siaa-ollama:11434", 
-                    "model_main": "granite3.3:2b"
+                    "model_main": "granite3.3:2b",
+                    "keep_alive": {"default": "30m"},
+                    "keep_warm_interval": 600,
+                    "num_parallel": 1,
+                    "num_ctx": 4096
                 },
                 "memory_limits": {
                     "actual_context_chars": 500,
                     "broader_context_chars": 600,
-                    "sql_search_limit": 3
+                    "sql_search_limit": 3,
+                    "window_search_limit": 30,
+                    "hot_days": 90,
+                    "consolidate_interval": 3600
                 }
             }
             with open(self.config_path, "w", encoding="utf-8") as f:
@@ -60,103 +129,535 @@ class MemoryManager:
             if not os.path.exists(path):
                 with open(path, "w", encoding="utf-8") as f: f.write("")
 
-    def get_context(self) -> str:
-        """Lê as camadas de memória para injetar no prompt."""
-        ctx = ""
+    def _layer(self, key: str, fname: str) -> tuple[str, str, int]:
+        """
+        (conteúdo, bloco '[X_MEMORY]' já renderizado, tokens do bloco) de uma
+        camada. O arquivo só é relido quando mtime/tamanho mudam — um stat
+        em vez de open+read; os tokens só são recontados se a calibração
+        do TokenCounter mudou.
+        """
+        path = os.path.join(self.contexts_dir, fname)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._layer_cache.pop(key, None)
+            return "", "", 0
+
+        stamp  = (st.st_mtime_ns, st.st_size)
+        ratio  = self.tokens.chars_per_token
+        cached = self._layer_cache.get(key)
+        if cached and cached[0] == stamp:
+            content, block, tokens, counted_at = cached[1]
+            if counted_at != ratio:
+                tokens = self.tokens.count(block)
+                self._layer_cache[key] = (stamp, (content, block, tokens, ratio))
+            return content, block, tokens
+
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read().strip()
+        block  = f"\n[{key.upper()}_MEMORY]\n{content}\n" if content else ""
+        tokens = self.tokens.count(block)
+        self._layer_cache[key] = (stamp, (content, block, tokens, ratio))
+        return content, block, tokens
+
+    def context_layers(self) -> list[tuple[str, str, str, int]]:
+        """[(camada, conteúdo, bloco renderizado, tokens do bloco)] na ordem de self.layers."""
+        layers = []
         for key, fname in self.layers.items():
-            path = os.path.join(self.contexts_dir, fname)
             try:
-                if os.path.exists(path):
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.read().strip()
-                        if content:
-                            ctx += f"\n[{key.upper()}_MEMORY]\n{content}\n"
+                layers.append((key, *self._layer(key, fname)))
             except Exception as e:
                 print(f"⚠️ Erro ao ler memória {key}: {e}")
-        return ctx
+        return layers
+
+    def get_context(self) -> str:
+        """Camadas de memória para injetar no prompt (cacheadas por mtime)."""
+        return "".join(block for _, _, block, _ in self.context_layers())
 
-    def _llm(self, prompt: str, fast: bool = False) -> str:
+    def invalidate_context(self, layer: str | None = None):
         """
-        Envia o pedido ao Ollama. 
-        Auto-corrige o endpoint para evitar o Erro 405.
+        Força a releitura de uma camada (ou de todas). Chamado por quem
+        escreve os arquivos — cobre sistemas de arquivos com mtime grosseiro,
+        onde duas escritas de mesmo tamanho no mesmo tique passariam batido.
         """
-        # 1. Resolução do Modelo
-        model = os.getenv(
+        if layer is None:
+            self._layer_cache.clear()
+        else:
+            self._layer_cache.pop(layer, None)
+
+    def prompt_builder(
+        self, profile: str = generation_profiles.DEFAULT_PROFILE, situational: bool = True,
+    ) -> PromptBuilder:
+        """
+        PromptBuilder com o orçamento da chamada: num_ctx menos a saída
+        reservada pelo perfil e o contexto situacional que o _generate injeta.
+        """
+        options = generation_profiles.resolve(
+            profile, self.bot_name, overrides=self.config.get("ollama", {}).get("profiles")
+        )
+        reserve = options.get("num_predict", 512)
+        if situational:
+            reserve += self.tokens.count(get_situational_context())
+        return PromptBuilder(budget=self._num_ctx() - reserve)
+
+    # ------------------------------------------------------------------
+    # Ollama
+    # ------------------------------------------------------------------
+
+    def _model(self, fast: bool = False) -> str:
+        return os.getenv(
             "OLLAMA_MODEL_FAST" if fast else "OLLAMA_MODEL_CHAT",
             self.config.get("ollama", {}).get("model_main", "granite3.3:2b")
         )
-        
-        # 2. Resolução da URL (Garante /api/generate)
-        base_url = os.getenv("OLLAMA_URL", self.config.get("ollama", {}).get("url", "http://siaa-ollama:11434"))
-        if not base_url.endswith("/api/generate"):
-            url = f"{base_url.rstrip('/')}/api/generate"
-        else:
-            url = base_url
 
-        # 3. Injeção de Contexto Situacional (Data/Hora)
-        situational = get_situational_context()
-        full_prompt = f"{situational}\n{prompt}"
+    def _num_ctx(self) -> int:
+        """
+        Janela de contexto única para todos os perfis: mudar o num_ctx
+        entre chamadas faz o Ollama recarregar o modelo.
+        """
+        return int(os.getenv("OLLAMA_NUM_CTX", self.config.get("ollama", {}).get("num_ctx", 4096)))
+
+    @staticmethod
+    def _base_url(url: str) -> str:
+        """Aceita URL com ou sem '/api/generate' (evita o Erro 405)."""
+        url = url.strip().rstrip("/")
+        if url.endswith("/api/generate"):
+            url = url[: -len("/api/generate")]
+        return url
+
+    def _ollama_urls(self) -> list[str]:
+        """
+        Backends do Ollama, em ordem de preferência:
+        OLLAMA_URLS (separados por vírgula) → config ollama.urls → OLLAMA_URL.
+        """
+        raw = os.getenv("OLLAMA_URLS") or self.config.get("ollama", {}).get("urls")
+        if isinstance(raw, str):
+            raw = raw.split(",")
+        if not raw:
+            raw = [os.getenv("OLLAMA_URL", self.config.get("ollama", {}).get("url", "http://siaa-ollama:11434"))]
+        return [self._base_url(u) for u in raw if u.strip()]
+
+    def _keep_alive_config(self) -> dict:
+        """
+        keep_alive por modelo. Aceita no config.json tanto uma string
+        ("30m") quanto um dict {"default": "30m", "<modelo>": "2h"}.
+        OLLAMA_KEEP_ALIVE no .env sobrescreve o default.
+        """
+        raw = self.config.get("ollama", {}).get("keep_alive", {})
+        keep_alive = dict(raw) if isinstance(raw, dict) else {"default": raw}
+        if os.getenv("OLLAMA_KEEP_ALIVE"):
+            keep_alive["default"] = os.getenv("OLLAMA_KEEP_ALIVE")
+        keep_alive.setdefault("default", "30m")
+        return keep_alive
+
+    def warm_up(self):
+        """
+        Health check dos backends + pré-carga dos modelos, tudo em background.
+        """
+        self.router.start()
+        self.warmup.start()
+
+    def notify_user_activity(self):
+        """Mensagem do usuário chegou: background na fila espera a vez."""
+        self.scheduler.notify_user_activity()
+
+    def llm_stats(self) -> dict:
+        """Contadores de latência (frio/quente), coalescência e fila."""
+        return {
+            "latency":       self.warmup.stats(),
+            "single_flight": self.flight.stats(),
+            "scheduler":     self.scheduler.stats(),
+            "backends":      self.router.stats(),
+            "tokens":        self.tokens.stats(),
+        }
+
+    def format_llm_stats(self) -> str:
+        """llm_stats() numa linha, para o log da manutenção."""
+        s    = self.llm_stats()
+        cold = s["latency"]["cold"]
+        warm = s["latency"]["warm"]
+        down = [b["url"] for b in s["backends"] if b["state"] != "closed"]
+        return (
+            f"📊 [LLM] frias: {cold['calls']} (avg {cold['avg_s']}s, máx {cold['max_s']}s) | "
+            f"quentes: {warm['calls']} (avg {warm['avg_s']}s, máx {warm['max_s']}s) | "
+            f"coalescidas: {s['single_flight']['coalesced']} | "
+            f"fila: {s['scheduler']['queued']} | "
+            f"chars/token: {s['tokens']['chars_per_token']}"
+            + (f" | backends fora: {', '.join(down)}" if down else "")
+        )
+
+    def _llm(
+        self, prompt: str, fast: bool = False, priority: str = "interactive",
+        profile: str = generation_profiles.DEFAULT_PROFILE,
+    ) -> str:
+        """
+        Envia o pedido ao Ollama e devolve apenas o texto da resposta.
+        priority: 'interactive' | 'extraction' | 'background' (ver LLMScheduler).
+        profile:  'chat' | 'memory' | 'extraction' | 'fact' | 'compaction'
+                  (ver core/generation_profiles.py).
+        """
+        return self._generate(prompt, fast=fast, priority=priority, profile=profile)["response"]
+
+    def _llm_background(self, prompt: str, fast: bool = True, profile: str = "compaction") -> str:
+        """
+        _llm para a manutenção: falha vira exceção em vez da mensagem de
+        erro amigável — que não pode ser gravada como resumo.
+        """
+        result = self._generate(prompt, fast=fast, priority="background", profile=profile)
+        if not result["ok"]:
+            raise RuntimeError(result["response"])
+        return result["response"]
+
+    def _llm_json(
+        self, prompt: str, schema: dict, fast: bool = True,
+        priority: str = "interactive", retries: int = 1,
+    ) -> dict:
+        """
+        Geração restrita a JSON: o schema vai no campo 'format' do Ollama
+        e a resposta é validada campo a campo (core/structured_output.py).
+        Campos inválidos são pedidos de novo (até 'retries' vezes) com um
+        schema só com eles. Devolve apenas os campos válidos — o chamador
+        aplica os próprios defaults para o que faltar.
+        """
+        valid, invalid = {}, dict.fromkeys(schema.get("properties", {}), "ausente")
+        ask, ask_schema = prompt, schema
+
+        for attempt in range(retries + 1):
+            result = self._generate(
+                ask, fast=fast, priority=priority, fmt=ask_schema, profile="extraction"
+            )
+            if not result["ok"]:
+                break
+
+            got, invalid = structured_output.validate(
+                structured_output.parse_json(result["response"]), ask_schema
+            )
+            valid.update(got)
+            if not invalid:
+                break
 
+            print(f"🧩 [LLM JSON] Campos inválidos (tentativa {attempt + 1}): {invalid}")
+            ask        = structured_output.retry_prompt(prompt, valid, invalid)
+            ask_schema = structured_output.subschema(schema, invalid)
+
+        return valid
+
+    def _llm_with_context(self, prompt: str, context: list | None = None) -> tuple:
+        """
+        Variante do _llm para conversas: devolve (resposta, context).
+
+        O 'context' retornado pelo Ollama são os tokens já avaliados
+        (prompt + resposta). Reenviá-lo no próximo turno faz o Ollama
+        avaliar apenas o prompt novo. Quando há context, o contexto
+        situacional não é reinjetado — ele já está nos tokens anteriores.
+        Em caso de erro, context volta None e o chamador deve reconstruir.
+        """
+        result = self._generate(
+            prompt, context=context, situational=context is None, profile="chat"
+        )
+        return result["response"], result["context"] if result["ok"] else None
+
+    def _generate(
+        self, prompt: str, fast: bool = False,
+        context: list | None = None, situational: bool = True,
+        priority: str = "interactive", fmt: dict | None = None,
+        profile: str = generation_profiles.DEFAULT_PROFILE,
+    ) -> dict:
+        """
+        Envia o pedido ao Ollama. 
+        Auto-corrige o endpoint para evitar o Erro 405.
+        fmt: JSON schema para saída estruturada (campo 'format' do Ollama).
+        profile: opções de geração (num_predict, stop, temperatura).
+        Retorna {"response": str, "context": list | None, "ok": bool}.
+        """
+        # 1. Resolução do Modelo (o backend é escolhido pelo LLMRouter)
+        model = self._model(fast)
+
+        # 2. Injeção de Contexto Situacional (Data/Hora)
+        full_prompt = f"{get_situational_context()}\n{prompt}" if situational else prompt
+
+        payload = {
+            "model":  model,
+            "prompt": full_prompt,
+            "stream": False,
+            "keep_alive": self.warmup.keep_alive_for(model),
+            "options": generation_profiles.resolve(
+                profile, self.bot_name, self._num_ctx(),
+                self.config.get("ollama", {}).get("profiles"),
+            ),
+        }
+        if context:
+            payload["context"] = context
+        if fmt:
+            # Stream: o FieldStream corta a geração assim que o JSON fecha
+            payload["format"] = fmt
+            payload["stream"] = True
+
+        # 3. Chamadas idênticas em voo compartilham um único request;
+        #    só o líder ocupa vaga na fila de prioridade.
+        site   = call_site()
+        leader = []
+
+        def _call():
+            leader.append(True)
+            with self.scheduler.slot(priority):
+                return self._post_generate(payload, site, priority)
+
+        key    = self.flight.key_for(payload)
+        result = dict(self.flight.do(key, _call))
+        if not leader:
+            self.telemetry.record(site, model, priority, "coalesced", cache="coalesced")
+        return result
+
+    def _post_generate(self, payload: dict, site: str = "?", priority: str = "interactive") -> dict:
+        """Executa o POST em /api/generate (com failover), registra a telemetria e normaliza a resposta."""
+        model   = payload["model"]
+        cache   = "kv" if "context" in payload else ""
+        backend = None
+        start   = time.time()
         try:
-            print(f"📡 [LLM CALL] URL: {url} | Modelo: {model}")
-            
-            r = requests.post(
-                url,
-                json={
-                    "model":  model,
-                    "prompt": full_prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.3,
-                        "stop": ["\nUsuário:", f"\n{self.bot_name}:", "\nUser:"]
-                    },
-                },
-                timeout=180, # Timeout estendido para nuvens mais lentas
+
+            # Timeout estendido para nuvens mais lentas
+            r, backend = self.router.post(
+                "/api/generate", payload, timeout=180, stream=payload["stream"]
             )
+            print(f"📡 [LLM CALL] URL: {backend.base_url} | Modelo: {model}"
+                  + (f" | context={len(payload['context'])} tokens" if "context" in payload else ""))
             r.raise_for_status()
-            res = r.json().get("response", "")
-            
+            data = (
+                self._read_stream(r, payload.get("format"), payload["prompt"])
+                if payload["stream"] else r.json()
+            )
+            res  = data.get("response", "")
+
+            # Sem context reaproveitado, prompt_eval_count ≈ tokens do prompt inteiro
+            # (a estimativa do stream cortado não calibra — seria a própria conta)
+            if (
+                "context" not in payload and data.get("prompt_eval_count")
+                and not data.get("prompt_eval_estimated")
+            ):
+                self.tokens.calibrate(len(payload["prompt"]), data["prompt_eval_count"])
+
+            elapsed = time.time() - start
+            kind    = self.warmup.record(
+                model, elapsed, data.get("load_duration", 0), classify=not data.get("early_stop"),
+            )
+            print(f"⏱️  [LLM] {model} respondeu em {elapsed:.2f}s ({kind}) "
+                  f"| prompt_eval={data.get('prompt_eval_count', '?')} tokens")
+            self.telemetry.record(
+                site, model, priority, "early_stop" if data.get("early_stop") else "ok", data,
+                backend=backend.base_url, cache=cache, elapsed=elapsed,
+            )
+
             # Limpeza de tags de raciocínio (deepseek/granite think tags)
             res = re.sub(r"<think>.*?</think>", "", res, flags=re.DOTALL).strip()
-            return res
+            return {"response": res, "context": data.get("context"), "ok": True}
 
         except requests.exceptions.ConnectionError:
-            print(f"❌ ERRO DE CONEXÃO: Não foi possível alcançar o Ollama em {url}")
-            return "Estou com dificuldades em conectar ao meu servidor de inteligência."
+            print(f"❌ ERRO DE CONEXÃO: Nenhum Ollama respondeu ({', '.join(self._ollama_urls())})")
+            res = "Estou com dificuldades em conectar ao meu servidor de inteligência."
             
         except requests.exceptions.HTTPError as e:
-            print(f"❌ ERRO HTTP {r.status_code}: {e}")
-            return "Tive um erro de comunicação técnica (HTTP)."
+            print(f"❌ ERRO HTTP {e.response.status_code if e.response is not None else '?'}: {e}")
+            res = "Tive um erro de comunicação técnica (HTTP)."
             
         except Exception as e:
             print(f"❌ ERRO NO LLM: {type(e).__name__}: {e}")
-            return "Estou processando informações..."
+            res = "Estou processando informações..."
+
+        self.telemetry.record(
+            site, model, priority, "error",
+            backend=backend.base_url if backend else "", cache=cache,
+            elapsed=time.time() - start,
+        )
+        return {"response": res, "context": None, "ok": False}
+
+    def _read_stream(self, r, schema: dict | None, prompt: str = "") -> dict:
+        """
+        Lê o NDJSON do /api/generate em stream. Com schema, fecha a conexão
+        assim que todos os campos obrigatórios chegaram completos — o resto
+        da geração (explicações, espaços em branco) nem é produzido.
+        Devolve o último chunk (com as métricas) e a resposta acumulada.
+        Cortado antes do chunk final, não há métricas do Ollama: o
+        prompt_eval_count é estimado (prompt_eval_estimated) e o
+        load_duration fica desconhecido.
+        """
+        fields = structured_output.FieldStream(schema) if schema else None
+        parts  = []
+        data   = {}
+        try:
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                parts.append(chunk.get("response", ""))
+                if chunk.get("done"):
+                    data = chunk
+                    break
+                if fields and fields.feed(parts[-1]):
+                    data = {
+                        "eval_count":            len(parts),
+                        "prompt_eval_count":     self.tokens.count(prompt),
+                        "prompt_eval_estimated": True,
+                        "early_stop":            True,
+                    }
+                    print(f"✂️  [LLM] Campos completos após {len(parts)} tokens — stream encerrado.")
+                    break
+        finally:
+            r.close()
+
+        data["response"] = "".join(parts)
+        return data
 
     def save_memory(self, intent: str, msg: str, reply: str):
-        """Delega ao módulo chat a gravação da interação."""
+        """
+        Enfileira a interação no MemoryPipeline e retorna na hora.
+        Log, extração de fatos e actual_context.txt rodam no worker.
+        """
         try:
-            from modules.chat.actions import ChatActions
-            ChatActions(self.db_path).save_interaction(
-                intent, msg, reply, self._llm, self.config, self.contexts_dir
-            )
+            self.pipeline.enqueue(intent, msg, reply)
         except Exception as e:
             print(f"⚠️ Falha ao salvar memória: {e}")
 
+    def start_pipeline(self):
+        """
+        Inicia o worker de memória (retoma jobs pendentes do último boot)
+        e o indexador semântico do long_term.
+        """
+        from modules.chat.actions import ChatActions
+
+        # Num data dir novo o long_term ainda não existe: cria antes de o
+        # indexador ler dele
+        ChatActions(self.db_path)
+        self.pipeline.start()
+        self.vectors.start()
+
     def search_long_term(self, query: str):
-        """Busca no histórico SQL."""
+        """
+        Busca no histórico. Com período citado ("ontem", "semana passada",
+        "em março"): resumos prontos do período (SummaryTree) e só as
+        interações da janela, lidas pelo índice (date, time). Depois
+        semântica (VectorMemory) e palavras (FTS5/BM25), também restritas
+        à janela — e, se a janela é mais antiga que o corte do banco
+        quente, nos meses arquivados (MemoryArchive).
+        Ordem de relevância, para quem corta do fim: acertos diretos
+        (semânticos por score, depois FTS por BM25, depois arquivo) e só
+        então os resumos do período, em ordem cronológica.
+        """
         try:
+            from framework.br_parser import parse_date_range, to_iso
             from modules.chat.actions import ChatActions
-            return ChatActions(self.db_path).search_memory(
-                query, self.config["memory_limits"]["sql_search_limit"]
+
+            limits = self.config["memory_limits"]
+            limit  = limits["sql_search_limit"]
+            window = parse_date_range(query)
+            if window:
+                window = tuple(to_iso(d) for d in window)
+                if None in window:
+                    window = None
+
+            actions = ChatActions(self.db_path)
+            lines   = [
+                f"[{h['date']} {h['time']}] {h['content']}"
+                for h in self.vectors.search(query, k=limit)
+                if not window or window[0] <= h["date"] <= window[1]
+            ]
+
+            # Sem assunto ("o que eu fiz ontem?"): a própria janela é a resposta
+            if window and not actions.search_terms(query):
+                limit = limits.get("window_search_limit", 30)
+            found = actions.search_memory(
+                query, limit,
+                date_from=window[0] if window else None,
+                date_to=window[1] if window else None,
             )
+            if found:
+                lines += found.split("\n")
+
+            # Período anterior ao corte: também nos meses arquivados
+            if window and window[0] < self.archive.cutoff():
+                lines += self.archive.search(
+                    actions.fts_query(query), actions.search_terms(query),
+                    window[0], min(window[1], self.archive.cutoff()), limit,
+                )
+
+            # Resumos por último: contexto do período, os primeiros a sair no corte
+            if window:
+                lines += self.summaries.lookup(*window)
+
+            return "\n".join(dict.fromkeys(lines)) or None
         except Exception: return None
 
-    def run_maintenance(self):
-        """Atualiza a memória de longo prazo."""
+    def run_maintenance(self) -> int:
+        """
+        Consolida no broader_context só as interações novas desde a última
+        rodada (watermark 'broader_watermark' em memory_state). Se o LLM
+        falhar, nem o arquivo nem o watermark mudam: o lote volta na
+        próxima rodada.
+        Sem watermark mas com broader_context.txt (atualização de uma versão
+        que reconsolidava tudo), começa das últimas 50 interações em vez de
+        passar o histórico inteiro de novo pelo LLM.
+        Retorna o quanto o watermark avançou (0 = nada novo).
+        """
         try:
             from modules.chat.actions import ChatActions
-            ChatActions(self.db_path).update_broader(
-                self._llm, self.config, self.contexts_dir
+            actions = ChatActions(self.db_path)
+            since   = self.state.get("broader_watermark")
+            if since is None:
+                since = 0
+                if os.path.exists(os.path.join(self.contexts_dir, "broader_context.txt")):
+                    with db.connect(self.db_path) as conn:
+                        top = conn.execute("SELECT MAX(id) FROM long_term").fetchone()[0] or 0
+                    since = max(top - 50, 0)
+                self.state.set("broader_watermark", since)
+            since = int(since)
+            last  = actions.update_broader(
+                self._llm_background,
+                self.config, self.contexts_dir, since_id=since,
             )
+            if last == since:
+                return 0
+            self.state.set("broader_watermark", last)
+            self.invalidate_context("broader")
+            print(f"📚 [Memória] Broader context consolidado até a interação #{last}.")
+            return last - since
         except Exception as e:
-            print(f"⚠️ Falha na manutenção de memória: {e}")
\ No newline at end of file
+            print(f"⚠️ Falha na manutenção de memória: {e}")
+            return 0
+
+    def _maintenance_interval(self) -> float:
+        return float(os.getenv(
+            "MEMORY_CONSOLIDATE_INTERVAL",
+            self.config["memory_limits"].get("consolidate_interval", 3600),
+        ))
+
+    def _maintenance_loop(self, interval: float):
+        # Primeira rodada depois do boot, quando o warmup já terminou
+        delay = min(interval, 120)
+        while not self._maintenance_stop.wait(delay):
+            # Rodadas têm teto (50 interações, max_calls resumos): se sobrou
+            # trabalho, segue sem esperar o intervalo
+            busy  = self.run_maintenance() >= 50
+            busy |= self.summaries.build() >= self.summaries.max_calls
+            # Depois dos resumos: só sai do banco quente o dia já resumido
+            self.archive.archive()
+            if not busy:
+                print(self.format_llm_stats())
+            delay = 1 if busy else interval
+
+    def start_maintenance(self):
+        """
+        Consolidação periódica em background: broader_context, resumos
+        de dia/semana/mês e arquivamento do long_term antigo (0 desativa).
+        """
+        interval = self._maintenance_interval()
+        if interval <= 0 or (self._maintenance_thread and self._maintenance_thread.is_alive()):
+            return
+        self._maintenance_thread = threading.Thread(
+            target=self._maintenance_loop, args=(interval,),
+            name="siaa-maintenance", daemon=True,
+        )
+        self._maintenance_thread.start()
+
+    def stop_maintenance(self):
+        self._maintenance_stop.set()
\ No newline at end of file
@@ -0,0 +1,286 @@
+"""
+memory_pipeline.py — Gravação de memória fora do caminho da resposta.
+
+Antes, fechar um turno rodava no event loop: log SQL + extração de fato
+(LLM) + compactação (LLM), tudo antes de a resposta sair. Agora:
+
+  1. save_memory() só grava a interação na fila 'memory_jobs' (SQLite)
+     e retorna na hora
+  2. Uma thread worker junta várias interações pendentes, grava o log
+     bruto no long_term e extrai os fatos de todas com UM prompt
+  3. Os fatos são aplicados ao actual_context.txt
+
+A fila é durável: se o bot cair no meio, os jobs pendentes são
+retomados no próximo boot.
+
+Estados de um job: pending → logged (já está no long_term) → removido.
+
+Falhas voltam para a fila com backoff exponencial (10s, 20s, 40s... até
+30 min). LLM fora do ar (LLMUnavailable) não conta tentativa: o job
+espera o Ollama voltar, o tempo que for. Só erro do próprio lote conta;
+depois de _MAX_ATTEMPTS o job já gravado no long_term sai da fila (perde
+só a extração de fato) e o que ainda não foi gravado fica como 'dead'
+— a única cópia da interação — e é reportado no boot.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from framework import db
+from framework.base_actions import BaseActions
+
+
+_MAX_ATTEMPTS = 5
+_BACKOFF_BASE = 10      # s
+_BACKOFF_MAX  = 1800    # s
+
+
+class LLMUnavailable(RuntimeError):
+    """O LLM não respondeu (conexão, HTTP, circuito aberto): refazer depois."""
+
+
+def _backoff(retries: int) -> float:
+    return min(_BACKOFF_BASE * 2 ** retries, _BACKOFF_MAX)
+
+
+def _add_backoff_columns(conn):
+    conn.execute("ALTER TABLE memory_jobs ADD COLUMN retries INTEGER DEFAULT 0")
+    conn.execute("ALTER TABLE memory_jobs ADD COLUMN next_attempt TEXT")
+
+
+class MemoryJobsActions(BaseActions):
+    MIGRATIONS = [(1, _add_backoff_columns)]
+
+    def __init__(self, db_path: str):
+        schema = (
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "created_at TEXT, intent TEXT, msg TEXT, reply TEXT, "
+            "status TEXT DEFAULT 'pending', attempts INTEGER DEFAULT 0, "
+            "retries INTEGER DEFAULT 0, next_attempt TEXT"
+        )
+        super().__init__(db_path, "memory_jobs", schema)
+
+    def pending(self, limit: int) -> list[dict]:
+        """Jobs vivos cujo backoff já venceu, do mais antigo ao mais novo."""
+        try:
+            with db.connect(self.db_path) as conn:
+                rows = db.dict_cursor(conn).execute(
+                    "SELECT * FROM memory_jobs WHERE status != 'dead' "
+                    "AND (next_attempt IS NULL OR next_attempt <= ?) "
+                    "ORDER BY id ASC LIMIT ?",
+                    (datetime.now().isoformat(timespec="seconds"), limit),
+                ).fetchall()
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"❌ MemoryJobsActions.pending: {e}")
+            return []
+
+    def next_retry_in(self, default: float) -> float:
+        """Segundos até o próximo job em backoff ficar pronto (no máximo 'default')."""
+        try:
+            with db.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT MIN(next_attempt) FROM memory_jobs "
+                    "WHERE status != 'dead' AND next_attempt IS NOT NULL"
+                ).fetchone()
+        except Exception:
+            return default
+        if not row or not row[0]:
+            return default
+        wait = (datetime.fromisoformat(row[0]) - datetime.now()).total_seconds()
+        return min(max(wait, 1), default)
+
+    def dead_count(self) -> int:
+        try:
+            with db.connect(self.db_path) as conn:
+                return conn.execute(
+                    "SELECT COUNT(*) FROM memory_jobs WHERE status = 'dead'"
+                ).fetchone()[0]
+        except Exception:
+            return 0
+
+    def fail(self, ids: list[int], count_attempt: bool = True) -> tuple[list[int], list[int]]:
+        """
+        Agenda a próxima tentativa com backoff. count_attempt=False (LLM
+        fora do ar) só adia. Retorna (removidos, mortos) entre os que
+        esgotaram as _MAX_ATTEMPTS.
+        """
+        now = datetime.now()
+        removed, dead = [], []
+        with db.transaction(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT id, status, attempts, retries FROM memory_jobs "
+                f"WHERE id IN ({', '.join('?' * len(ids))})",
+                ids,
+            ).fetchall()
+            for id_, status, attempts, retries in rows:
+                attempts += count_attempt
+                if attempts >= _MAX_ATTEMPTS:
+                    if status == "logged":
+                        # A interação já está no long_term: só a extração de fato se perde
+                        conn.execute("DELETE FROM memory_jobs WHERE id = ?", (id_,))
+                        removed.append(id_)
+                    else:
+                        conn.execute(
+                            "UPDATE memory_jobs SET status = 'dead', attempts = ? WHERE id = ?",
+                            (attempts, id_),
+                        )
+                        dead.append(id_)
+                    continue
+                conn.execute(
+                    "UPDATE memory_jobs SET attempts = ?, retries = retries + 1, "
+                    "next_attempt = ? WHERE id = ?",
+                    (attempts, (now + timedelta(seconds=_backoff(retries))).isoformat(timespec="seconds"), id_),
+                )
+        return removed, dead
+
+
+class MemoryStateActions(BaseActions):
+    """Chave/valor persistente da memória (ex: watermark da consolidação)."""
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path, "memory_state", "key TEXT PRIMARY KEY, value TEXT")
+
+    def get(self, key: str, default: str = None) -> str | None:
+        try:
+            with db.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT value FROM memory_state WHERE key = ?", (key,)
+                ).fetchone()
+            return row[0] if row else default
+        except Exception as e:
+            print(f"❌ MemoryStateActions.get: {e}")
+            return default
+
+    def set(self, key: str, value):
+        with db.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO memory_state (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, str(value)),
+            )
+
+
+class MemoryPipeline:
+    def __init__(self, memory, batch_size: int = 5, batch_wait: float = 5.0):
+        self.mem        = memory
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait   # segundos esperando juntar mais interações
+        self.jobs       = MemoryJobsActions(memory.db_path)
+
+        self._wake   = threading.Event()
+        self._stop   = threading.Event()
+        self._thread = None
+        self._lock   = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def enqueue(self, intent: str, msg: str, reply: str) -> bool:
+        """Aceita a interação instantaneamente (um INSERT) e acorda o worker."""
+        ok = self.jobs.insert({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "intent":     intent,
+            "msg":        msg,
+            "reply":      reply,
+        })
+        self.start()
+        self._wake.set()
+        return ok
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            dead = self.jobs.dead_count()
+            if dead:
+                print(
+                    f"⚠️ [MemoryPipeline] {dead} interação(ões) com status 'dead' em "
+                    f"memory_jobs — não entraram no long_term; revise a tabela."
+                )
+            self._thread = threading.Thread(
+                target=self._loop, name="siaa-memory-pipeline", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _loop(self):
+        while not self._stop.is_set():
+            batch = self.jobs.pending(self.batch_size)
+            if not batch:
+                self._wake.wait(self.jobs.next_retry_in(60))
+                self._wake.clear()
+                continue
+
+            # Janela de batching: espera juntar mais, sem segurar o mais antigo demais
+            oldest = datetime.fromisoformat(batch[0]["created_at"])
+            age    = (datetime.now() - oldest).total_seconds()
+            if len(batch) < self.batch_size and age < self.batch_wait:
+                self._wake.wait(self.batch_wait - age)
+                self._wake.clear()
+                continue
+
+            self._process(batch)
+
+    def _llm(self, prompt: str, fast: bool = True, profile: str = "fact") -> str:
+        """LLM com prioridade de extração; falha vira exceção para o job ser refeito."""
+        result = self.mem._generate(prompt, fast=fast, priority="extraction", profile=profile)
+        if not result["ok"]:
+            raise LLMUnavailable(result["response"])
+        return result["response"]
+
+    def _process(self, batch: list[dict]):
+        from modules.chat.actions import ChatActions
+
+        ids     = [j["id"] for j in batch]
+        actions = ChatActions(self.mem.db_path)
+        start   = time.time()
+
+        try:
+            for job in batch:
+                if job["status"] == "pending":
+                    # Log e 'logged' na mesma transação: nem perde a interação
+                    # (insert falhou) nem a duplica (queda entre os dois)
+                    with db.transaction(self.mem.db_path) as conn:
+                        actions.log_interaction(
+                            job["intent"], job["msg"], job["reply"],
+                            datetime.fromisoformat(job["created_at"]),
+                        )
+                        conn.execute(
+                            "UPDATE memory_jobs SET status = 'logged' WHERE id = ?", (job["id"],)
+                        )
+                    job["status"] = "logged"
+            self.mem.vectors.notify()
+
+            relevant = [
+                (j["msg"], j["reply"], datetime.fromisoformat(j["created_at"]))
+                for j in batch if actions.is_relevant(j["reply"])
+            ]
+            facts = actions.extract_facts(relevant, self._llm)
+            actions.apply_facts(facts, self._llm, self.mem.config, self.mem.contexts_dir)
+            self.mem.invalidate_context("actual")
+
+            self.jobs.delete(ids)
+            print(
+                f"🧠 [MemoryPipeline] {len(batch)} interação(ões) → "
+                f"{len(facts)} fato(s) em {time.time() - start:.1f}s"
+            )
+        except LLMUnavailable as e:
+            print(f"⚠️ [MemoryPipeline] LLM indisponível, lote {ids} adiado: {e}")
+            self.jobs.fail(ids, count_attempt=False)
+        except Exception as e:
+            print(f"⚠️ [MemoryPipeline] Falha no lote {ids}: {e}")
+            removed, dead = self.jobs.fail(ids)
+            if removed:
+                print(f"🗑️ [MemoryPipeline] Jobs {removed} desistidos (já no long_term, sem extração de fato).")
+            if dead:
+                print(f"☠️ [MemoryPipeline] Jobs {dead} marcados 'dead' após {_MAX_ATTEMPTS} tentativas.")
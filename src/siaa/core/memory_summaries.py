@@ -0,0 +1,258 @@
+"""
+memory_summaries.py — Árvore de resumos do long_term (dia → semana → mês).
+
+O broader_context só enxerga as interações recentes; perguntas sobre
+períodos antigos ("o que eu fiz em março?") caíam numa varredura do
+long_term bruto. Aqui cada período fechado ganha um resumo, gerado uma
+única vez e guardado na tabela 'memory_summaries':
+
+  day   → das interações brutas do dia
+  week  → dos resumos diários da semana ISO (segunda a domingo)
+  month → dos resumos semanais; a semana entra no mês da sua quinta-feira
+          (regra da ISO 8601), então um mês pode "emprestar" uns dias
+          da semana de fronteira
+
+Um período só é resumido quando já terminou e todos os filhos dele já
+têm resumo — assim nunca precisa ser refeito. A construção roda na
+manutenção em background (MemoryManager._maintenance_loop), com um teto
+de chamadas ao LLM por rodada.
+
+lookup(de, até) devolve a cobertura mais grossa do intervalo: meses
+inteiros, depois semanas inteiras, depois dias.
+"""
+
+from datetime import date, datetime, timedelta
+
+from framework import db
+from framework.base_actions import BaseActions
+from framework.prompt_builder import PromptBuilder
+
+
+_LEVELS = ("day", "week", "month")
+
+_LABELS = {"day": "resumo do dia", "week": "resumo da semana", "month": "resumo do mês"}
+
+_PROMPTS = {
+    "day":   "Resuma em até 3 tópicos curtos o que o usuário fez, pediu ou contou em {period}.",
+    "week":  "Junte os resumos diários da semana {period} em até 4 tópicos curtos, sem repetir fatos.",
+    "month": "Junte os resumos semanais do mês {period} em até 5 tópicos curtos, só o que importa.",
+}
+
+SUMMARY_CHARS = 500
+
+
+def _week_start(d: date) -> date:
+    return d - timedelta(days=d.weekday())
+
+
+def _week_key(d: date) -> str:
+    year, week, _ = d.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _month_key(d: date) -> str:
+    """Mês da semana de 'd' (o da quinta-feira dela)."""
+    return (_week_start(d) + timedelta(days=3)).strftime("%Y-%m")
+
+
+def _month_bounds(key: str) -> tuple[date, date]:
+    first = datetime.strptime(key, "%Y-%m").date()
+    nxt   = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return first, nxt - timedelta(days=1)
+
+
+def _month_closed(key: str, today: date) -> bool:
+    """Fechado quando a última semana atribuída a ele terminou."""
+    _, last = _month_bounds(key)
+    last_thursday = last - timedelta(days=(last.weekday() - 3) % 7)
+    return last_thursday + timedelta(days=3) < today
+
+
+class MemorySummariesActions(BaseActions):
+    def __init__(self, db_path: str):
+        schema = (
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "level TEXT, period TEXT, date_from TEXT, date_to TEXT, "
+            "content TEXT, sources INTEGER, created_at TEXT, "
+            "UNIQUE(level, period)"
+        )
+        super().__init__(db_path, "memory_summaries", schema)
+
+    def periods(self, level: str) -> set[str]:
+        try:
+            with db.connect(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT period FROM memory_summaries WHERE level = ?", (level,)
+                ).fetchall()
+            return {r[0] for r in rows}
+        except Exception as e:
+            print(f"❌ MemorySummariesActions.periods: {e}")
+            return set()
+
+    def children(self, level: str, date_from: str, date_to: str) -> list[tuple[str, str]]:
+        """(período, conteúdo) dos resumos de 'level' dentro do intervalo, em ordem."""
+        with db.connect(self.db_path) as conn:
+            return conn.execute(
+                "SELECT period, content FROM memory_summaries "
+                "WHERE level = ? AND date_from >= ? AND date_to <= ? ORDER BY date_from",
+                (level, date_from, date_to),
+            ).fetchall()
+
+    def save(self, level: str, period: str, date_from: str, date_to: str, content: str, sources: int):
+        self.insert({
+            "level":      level,
+            "period":     period,
+            "date_from":  date_from,
+            "date_to":    date_to,
+            "content":    content,
+            "sources":    sources,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def within(self, date_from: str, date_to: str) -> list[dict]:
+        try:
+            with db.connect(self.db_path) as conn:
+                rows = db.dict_cursor(conn).execute(
+                    "SELECT level, period, date_from, date_to, content FROM memory_summaries "
+                    "WHERE date_from >= ? AND date_to <= ? ORDER BY date_from",
+                    (date_from, date_to),
+                ).fetchall()
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"❌ MemorySummariesActions.within: {e}")
+            return []
+
+
+class SummaryTree:
+    def __init__(self, memory, max_calls: int = 12):
+        self.mem       = memory
+        self.db        = MemorySummariesActions(memory.db_path)
+        self.max_calls = max_calls
+
+    # ------------------------------------------------------------------
+    # Construção
+    # ------------------------------------------------------------------
+
+    def _summarize(self, level: str, period: str, lines: list[str]) -> str:
+        pb = PromptBuilder()
+        pb.add(_PROMPTS[level].format(period=period) + "\n\n")
+        pb.add("\n".join(lines), priority=0, trim="lines", keep="head")
+        # Falha do LLM levanta exceção: a mensagem de erro nunca vira resumo
+        # (um período resumido não é refeito e libera o dia para o arquivo)
+        text = self.mem._llm_background(pb.build(), fast=True, profile="compaction")
+        return (text or "").strip()[:SUMMARY_CHARS]
+
+    def _raw_days(self, today: date) -> list[date]:
+        with db.connect(self.mem.db_path) as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT date FROM long_term WHERE date < ? ORDER BY date",
+                (today.isoformat(),),
+            ).fetchall()
+        days = []
+        for (raw,) in rows:
+            try:
+                days.append(date.fromisoformat(raw))
+            except (TypeError, ValueError):
+                continue
+        return days
+
+    def build(self, now: datetime = None) -> int:
+        """
+        Resume os períodos fechados que ainda não têm resumo. Retorna quantos
+        criou. Se o LLM falhar, a rodada para ali e o resto fica para a próxima.
+        """
+        today = (now or datetime.now()).date()
+        built = 0
+        try:
+            days  = self._raw_days(today)
+            have  = {level: self.db.periods(level) for level in _LEVELS}
+
+            for d in days:
+                if built >= self.max_calls:
+                    break
+                key = d.isoformat()
+                if key in have["day"]:
+                    continue
+                with db.connect(self.mem.db_path) as conn:
+                    rows = conn.execute(
+                        "SELECT time, content FROM long_term WHERE date = ? ORDER BY id",
+                        (key,),
+                    ).fetchall()
+                content = self._summarize("day", d.strftime("%d/%m/%Y"), [f"{t} {c}" for t, c in rows])
+                if content:
+                    self.db.save("day", key, key, key, content, len(rows))
+                    have["day"].add(key)
+                    built += 1
+
+            # Semanas: fechadas e com todos os dias de dados já resumidos
+            weeks = {}
+            for d in days:
+                weeks.setdefault(_week_key(d), []).append(d)
+            for key, members in sorted(weeks.items()):
+                start = _week_start(members[0])
+                end   = start + timedelta(days=6)
+                if built >= self.max_calls or key in have["week"] or end >= today:
+                    continue
+                if any(d.isoformat() not in have["day"] for d in members):
+                    continue
+                children = self.db.children("day", start.isoformat(), end.isoformat())
+                content  = self._summarize(
+                    "week", f"{start:%d/%m} a {end:%d/%m/%Y}",
+                    [f"[{p}] {c}" for p, c in children],
+                )
+                if content:
+                    self.db.save("week", key, start.isoformat(), end.isoformat(), content, len(children))
+                    have["week"].add(key)
+                    built += 1
+
+            # Meses: fechados e com todas as semanas de dados já resumidas
+            months = {}
+            for key, members in weeks.items():
+                months.setdefault(_month_key(members[0]), set()).add(key)
+            for key, week_keys in sorted(months.items()):
+                if built >= self.max_calls or key in have["month"] or not _month_closed(key, today):
+                    continue
+                if not week_keys <= have["week"]:
+                    continue
+                first, last = _month_bounds(key)
+                # As semanas de fronteira passam dos limites do mês
+                children = [
+                    (p, c) for p, c in self.db.children(
+                        "week", (first - timedelta(days=6)).isoformat(),
+                        (last + timedelta(days=6)).isoformat(),
+                    ) if p in week_keys
+                ]
+                content = self._summarize("month", f"{first:%m/%Y}", [f"[{p}] {c}" for p, c in children])
+                if content:
+                    self.db.save("month", key, first.isoformat(), last.isoformat(), content, len(children))
+                    built += 1
+        except Exception as e:
+            print(f"⚠️  [SummaryTree] Falha ao resumir períodos: {e}")
+
+        if built:
+            print(f"🗂️  [SummaryTree] {built} resumo(s) de período criado(s).")
+        return built
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def lookup(self, date_from: str, date_to: str, limit: int = 6) -> list[str]:
+        """
+        Resumos que cobrem [date_from, date_to] (AAAA-MM-DD): o nível mais
+        grosso que cabe inteiro no intervalo, sem sobreposição.
+        """
+        rows   = self.db.within(date_from, date_to)
+        chosen = []
+        for level in reversed(_LEVELS):
+            for r in rows:
+                if r["level"] != level:
+                    continue
+                if any(r["date_from"] <= c["date_to"] and c["date_from"] <= r["date_to"] for c in chosen):
+                    continue
+                chosen.append(r)
+        chosen.sort(key=lambda r: r["date_from"])
+        return [
+            f"[{_LABELS[r['level']]} {r['period']}] " + " ".join(r["content"].split())
+            for r in chosen[-limit:]
+        ]
@@ -0,0 +1,151 @@
+"""
+model_warmup.py — Pré-carregamento e keep-warm dos modelos no Ollama.
+
+Responsabilidades:
+  1. Carregar OLLAMA_MODEL_CHAT e OLLAMA_MODEL_FAST no boot (em background)
+  2. Resolver o keep_alive de cada modelo (config.json / .env)
+  3. Mandar um ping barato quando o modelo fica ocioso, antes do Ollama
+     descarregá-lo da RAM
+  4. Medir a latência das chamadas separando frias (com load) de quentes
+
+Um request a /api/generate sem prompt apenas carrega o modelo — não gera
+nenhum token, por isso serve tanto para o preload quanto para o ping.
+"""
+
+import threading
+import time
+
+import requests
+
+
+# load_duration acima disso indica que o modelo precisou ser carregado
+COLD_LOAD_THRESHOLD_S = 0.5
+
+
+class ModelWarmup:
+    def __init__(
+        self,
+        generate_urls,
+        models: list[str],
+        keep_alive: dict,
+        interval: int = 600,
+        options: dict | None = None,
+    ):
+        self.generate_urls = generate_urls  # callable → URLs de /api/generate de cada backend
+        self.models       = list(dict.fromkeys(models))  # remove duplicados mantendo ordem
+        self.keep_alive   = keep_alive
+        self.interval     = interval
+        self.options      = options or {}  # ex: num_ctx — igual ao das chamadas, senão o Ollama recarrega
+
+        self._last_used = {m: 0.0 for m in self.models}
+        self._stats     = {"cold": [0, 0.0, 0.0], "warm": [0, 0.0, 0.0]}  # n, soma, máx
+        self._lock      = threading.Lock()
+        self._stop      = threading.Event()
+        self._thread    = None
+
+    # ------------------------------------------------------------------
+    # keep_alive
+    # ------------------------------------------------------------------
+
+    def keep_alive_for(self, model: str):
+        """keep_alive específico do modelo, ou o 'default'."""
+        return self.keep_alive.get(model, self.keep_alive.get("default", "30m"))
+
+    # ------------------------------------------------------------------
+    # Preload / ping
+    # ------------------------------------------------------------------
+
+    def _load(self, model: str) -> bool:
+        """Carrega o modelo em todos os backends (cada Ollama tem sua RAM)."""
+        loaded = False
+        for url in self.generate_urls():
+            start = time.time()
+            try:
+                r = requests.post(
+                    url,
+                    json={
+                        "model":      model,
+                        "keep_alive": self.keep_alive_for(model),
+                        "options":    self.options,
+                    },
+                    timeout=300,
+                )
+                r.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️  [Warmup] Falha ao carregar {model} em {url}: {e}")
+                continue
+
+            loaded = True
+            print(f"🔥 [Warmup] {model} pronto em {url} ({time.time() - start:.1f}s)")
+
+        if loaded:
+            self.touch(model)
+        return loaded
+
+    def preload(self):
+        """Carrega todos os modelos configurados (bloqueante)."""
+        for model in self.models:
+            self._load(model)
+
+    def _loop(self):
+        self.preload()
+        while not self._stop.wait(self.interval / 2):
+            now = time.time()
+            for model in self.models:
+                with self._lock:
+                    idle = now - self._last_used.get(model, 0.0)
+                if idle >= self.interval:
+                    print(f"♨️  [Warmup] {model} ocioso há {idle:.0f}s — ping.")
+                    self._load(model)
+
+    def start(self):
+        """Preload + keep-warm em thread daemon, sem bloquear o boot."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name="siaa-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def touch(self, model: str):
+        with self._lock:
+            self._last_used[model] = time.time()
+
+    def record(
+        self, model: str, elapsed: float, load_duration_ns: int = 0, classify: bool = True,
+    ) -> str:
+        """
+        Registra uma chamada real ao LLM. Retorna 'cold' ou 'warm'.
+        O Ollama devolve load_duration em nanossegundos.
+        classify=False (stream cortado, sem load_duration): só marca o uso
+        do modelo, sem entrar nas médias — retorna 'unknown'.
+        """
+        with self._lock:
+            self._last_used[model] = time.time()
+        if not classify:
+            return "unknown"
+
+        kind = "cold" if load_duration_ns / 1e9 > COLD_LOAD_THRESHOLD_S else "warm"
+        with self._lock:
+            s = self._stats[kind]
+            s[0] += 1
+            s[1] += elapsed
+            s[2]  = max(s[2], elapsed)
+        return kind
+
+    def stats(self) -> dict:
+        """{'cold': {'calls', 'avg_s', 'max_s'}, 'warm': {...}}"""
+        with self._lock:
+            return {
+                kind: {
+                    "calls": n,
+                    "avg_s": round(total / n, 3) if n else 0.0,
+                    "max_s": round(peak, 3),
+                }
+                for kind, (n, total, peak) in self._stats.items()
+            }
@@ -0,0 +1,74 @@
+"""
+single_flight.py — Coalescência de chamadas idênticas em andamento.
+
+Se duas threads pedem a mesma coisa ao mesmo tempo (ex: dois crons ou
+mensagens repetidas disparando a mesma extração), só a primeira executa;
+as demais esperam e recebem o mesmo resultado.
+
+Não é um cache: assim que a chamada termina a chave é liberada e a
+próxima chamada idêntica vai ao Ollama normalmente.
+"""
+
+import hashlib
+import json
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event   = threading.Event()
+        self.result  = None
+        self.error   = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock  = threading.Lock()
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0}
+
+    @staticmethod
+    def key_for(payload: dict) -> str:
+        """Hash estável do payload (modelo + prompt + opções)."""
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def do(self, key: str, fn):
+        """Executa fn() uma única vez por chave em voo e compartilha o retorno."""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            print(f"🔗 [SingleFlight] Chamada idêntica em andamento — aguardando ({key[:8]})")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
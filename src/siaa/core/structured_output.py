@@ -0,0 +1,169 @@
+"""
+structured_output.py — Validação das respostas JSON do Ollama.
+
+As extrações (finanças, agenda) pediam texto livre no formato
+'VALOR: ... / TITULO: ...' e liam com regex; qualquer desvio do modelo
+virava valor padrão em silêncio. Agora o MemoryManager manda o schema
+no campo 'format' do /api/generate (o Ollama restringe a geração a JSON
+válido) e este módulo confere o resultado campo a campo.
+
+Subconjunto de JSON Schema suportado (o que as extrações usam):
+  type (string | number | integer | boolean), enum, pattern,
+  minLength / maxLength, minimum / maximum, required.
+
+Campos inválidos são descartados e listados, para que só eles sejam
+pedidos de novo — os válidos não são gerados outra vez.
+
+FieldStream lê o JSON enquanto os tokens chegam (stream do Ollama) e
+avisa quando todos os campos obrigatórios já estão completos — o
+MemoryManager fecha a conexão ali, sem esperar o modelo terminar (com
+'format', modelos pequenos costumam emendar espaços/quebras de linha
+até o num_predict depois do '}').
+"""
+
+import json
+import re
+
+
+_KEY_RE  = re.compile(r'"([^"\\]+)"\s*:\s*')
+_DECODER  = json.JSONDecoder()
+
+
+def partial_fields(text: str) -> dict:
+    """
+    Campos já completos de um objeto JSON possivelmente truncado.
+    Um valor só conta quando vem seguido de ',' ou '}' — assim '45' não
+    é aceito enquanto '45.90' ainda está chegando.
+    """
+    fields = {}
+    for m in _KEY_RE.finditer(text or ""):
+        try:
+            value, end = _DECODER.raw_decode(text, m.end())
+        except ValueError:
+            continue
+        rest = text[end:].lstrip()
+        if rest[:1] in (",", "}"):
+            fields[m.group(1)] = value
+    return fields
+
+
+def parse_json(text: str) -> dict | None:
+    """JSON da resposta, tolerando texto/cercas de código em volta ou corte no meio."""
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        match = re.search(r"\{.*\}", text or "", re.DOTALL)
+        try:
+            data = json.loads(match.group(0)) if match else None
+        except ValueError:
+            data = None
+        if data is None:
+            return partial_fields(text) or None
+    return data if isinstance(data, dict) else None
+
+
+class FieldStream:
+    """Acumula os pedaços do stream e diz quando o obrigatório já chegou."""
+
+    def __init__(self, schema: dict):
+        properties    = schema.get("properties", {})
+        self.required = schema.get("required", list(properties))
+        self.buffer   = ""
+
+    def feed(self, text: str) -> bool:
+        self.buffer += text
+        return self.complete()
+
+    def complete(self) -> bool:
+        if not self.required:
+            return False
+        fields = partial_fields(self.buffer)
+        return all(f in fields for f in self.required)
+
+
+def _coerce(value, spec: dict):
+    """Ajustes seguros de tipo ('45,90' → 45.9). Levanta ValueError se não der."""
+    kind = spec.get("type")
+    if kind == "string":
+        if not isinstance(value, str):
+            raise ValueError("esperava texto")
+        return value.strip()
+    if kind in ("number", "integer"):
+        if isinstance(value, bool):
+            raise ValueError("esperava número")
+        if isinstance(value, str):
+            value = float(value.strip().replace(",", "."))
+        if not isinstance(value, (int, float)):
+            raise ValueError("esperava número")
+        if kind == "integer":
+            if value != int(value):
+                raise ValueError("esperava inteiro")
+            return int(value)
+        return float(value)
+    if kind == "boolean":
+        if not isinstance(value, bool):
+            raise ValueError("esperava true/false")
+    return value
+
+
+def _check(value, spec: dict):
+    value = _coerce(value, spec)
+
+    if "enum" in spec and value not in spec["enum"]:
+        raise ValueError(f"fora de {spec['enum']}")
+    if isinstance(value, str):
+        if "pattern" in spec and not re.search(spec["pattern"], value):
+            raise ValueError(f"não casa com {spec['pattern']}")
+        if len(value) < spec.get("minLength", 0):
+            raise ValueError("vazio")
+        if "maxLength" in spec and len(value) > spec["maxLength"]:
+            raise ValueError(f"mais de {spec['maxLength']} caracteres")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if "minimum" in spec and value < spec["minimum"]:
+            raise ValueError(f"menor que {spec['minimum']}")
+        if "maximum" in spec and value > spec["maximum"]:
+            raise ValueError(f"maior que {spec['maximum']}")
+    return value
+
+
+def validate(data: dict | None, schema: dict) -> tuple[dict, dict]:
+    """
+    Confere 'data' contra o schema.
+    Retorna (válidos, inválidos) — inválidos = {campo: motivo}.
+    """
+    data       = data or {}
+    properties = schema.get("properties", {})
+    required   = schema.get("required", list(properties))
+
+    valid, invalid = {}, {}
+    for field, spec in properties.items():
+        if field not in data or data[field] is None:
+            if field in required:
+                invalid[field] = "ausente"
+            continue
+        try:
+            valid[field] = _check(data[field], spec)
+        except (TypeError, ValueError) as e:
+            invalid[field] = str(e)
+    return valid, invalid
+
+
+def subschema(schema: dict, fields) -> dict:
+    """Schema só com os campos pedidos (para o retry dos inválidos)."""
+    fields = list(fields)
+    return {
+        "type":       "object",
+        "properties": {f: schema["properties"][f] for f in fields},
+        "required":   [f for f in schema.get("required", fields) if f in fields],
+    }
+
+
+def retry_prompt(prompt: str, valid: dict, invalid: dict) -> str:
+    """Reapresenta o pedido original, fixando o que já veio certo."""
+    errors = "\n".join(f"- {field}: {reason}" for field, reason in invalid.items())
+    known  = json.dumps(valid, ensure_ascii=False)
+    return (
+        f"{prompt}\n\n"
+        f"Já extraído (não repita): {known}\n"
+        f"Corrija SOMENTE estes campos:\n{errors}"
+    )
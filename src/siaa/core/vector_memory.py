@@ -0,0 +1,243 @@
+"""
+vector_memory.py — Índice semântico do long_term.
+
+A busca FTS5 acha palavras; "o que falamos sobre o dentista" não acha
+"marquei a limpeza dos dentes". Aqui cada interação do long_term ganha
+um embedding (POST /api/embed do Ollama, modelo OLLAMA_MODEL_EMBED) e
+a busca é por similaridade de cosseno.
+
+Armazenamento, ao lado do siaa.db:
+  long_term_vectors.npy      → matriz float16 (N × D), linhas normalizadas
+  long_term_vectors.ids.npy  → id do long_term de cada linha (int64)
+
+  - Indexação incremental em thread: só linhas com id > último indexado,
+    em lotes, com prioridade 'background' no LLMScheduler
+  - Os lotes se acumulam em memória e a matriz é juntada e gravada uma
+    vez a cada SAVE_EVERY lotes (e no fim do sync) — a indexação inicial
+    de um long_term grande não regrava o arquivo inteiro a cada lote
+  - Gravação atômica (arquivo temporário + os.replace)
+  - Troca de modelo (dimensão diferente): o índice é zerado e o long_term
+    inteiro é reindexado desde o id 0
+  - Busca vetorizada: um produto matriz·vetor + argpartition para o top-k
+  - Hits que já foram para o arquivo frio (MemoryArchive) são lidos de lá
+  - Sem modelo de embedding (OLLAMA_MODEL_EMBED vazio, ou o Ollama
+    responde 4xx — modelo não instalado), o índice fica desligado e a
+    busca devolve []
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from framework import db
+
+
+class VectorMemory:
+    BATCH      = 32
+    SAVE_EVERY = 32   # lotes por gravação (~1000 linhas)
+
+    def __init__(self, memory, model: str, min_score: float = 0.45):
+        self.mem       = memory
+        self.model     = model
+        self.min_score = min_score
+        self.path      = os.path.join(memory.data_dir, "long_term_vectors.npy")
+        self.ids_path  = os.path.join(memory.data_dir, "long_term_vectors.ids.npy")
+
+        self._matrix  = None   # float16 (N × D)
+        self._ids     = None   # int64 (N,)
+        self._lock    = threading.Lock()
+        self._wake    = threading.Event()
+        self._stop    = threading.Event()
+        self._thread  = None
+        self.enabled  = bool(model)
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        if self._matrix is not None:
+            return
+        if os.path.exists(self.path) and os.path.exists(self.ids_path):
+            matrix, ids = np.load(self.path), np.load(self.ids_path)
+            if len(ids) == matrix.shape[0]:
+                self._matrix, self._ids = matrix, ids
+                return
+            # Queda entre as duas gravações: descarta e reindexa
+            print("⚠️  [VectorMemory] Índice inconsistente — reindexando do zero.")
+        self._matrix = np.zeros((0, 0), dtype=np.float16)
+        self._ids    = np.zeros(0, dtype=np.int64)
+
+    def _save(self):
+        for arr, path in ((self._matrix, self.path), (self._ids, self.ids_path)):
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmp, path)
+
+    def last_id(self) -> int:
+        with self._lock:
+            self._load()
+            return int(self._ids.max()) if len(self._ids) else 0
+
+    # ------------------------------------------------------------------
+    # Embeddings
+    # ------------------------------------------------------------------
+
+    def _embed(self, texts: list[str], priority: str) -> np.ndarray:
+        """Embeddings normalizados (float32) via /api/embed."""
+        with self.mem.scheduler.slot(priority):
+            r, _ = self.mem.router.post(
+                "/api/embed", {"model": self.model, "input": texts}, timeout=120
+            )
+        r.raise_for_status()
+        vecs  = np.asarray(r.json()["embeddings"], dtype=np.float32)
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        return vecs / np.maximum(norms, 1e-9)
+
+    # ------------------------------------------------------------------
+    # Indexação incremental
+    # ------------------------------------------------------------------
+
+    def sync(self) -> int:
+        """Indexa as linhas novas do long_term. Retorna quantas entraram."""
+        total, last = 0, self.last_id()
+        vecs, ids   = [], []
+        try:
+            while not self._stop.is_set():
+                with db.connect(self.mem.db_path) as conn:
+                    rows = conn.execute(
+                        "SELECT id, content FROM long_term WHERE id > ? ORDER BY id LIMIT ?",
+                        (last, self.BATCH),
+                    ).fetchall()
+                if not rows:
+                    saved     = self._append(vecs, ids)
+                    vecs, ids = [], []
+                    if saved:
+                        break
+                    # Dimensão mudou: o índice foi zerado, recomeça do id 0
+                    last, total = 0, 0
+                    continue
+
+                vecs.append(self._embed([c for _, c in rows], "background").astype(np.float16))
+                ids.append(np.fromiter((i for i, _ in rows), dtype=np.int64, count=len(rows)))
+                last   = rows[-1][0]
+                total += len(rows)
+                if len(vecs) >= self.SAVE_EVERY:
+                    saved     = self._append(vecs, ids)
+                    vecs, ids = [], []
+                    if not saved:
+                        last, total = 0, 0
+        finally:
+            # Falha no meio: o que já foi embedado não se perde
+            self._append(vecs, ids)
+
+        if total:
+            print(f"🧭 [VectorMemory] {total} interação(ões) indexada(s) ({len(self._ids)} no total).")
+        return total
+
+    def _append(self, vecs: list, ids: list) -> bool:
+        """
+        Junta os lotes acumulados à matriz e grava (uma vez).
+        Retorna False se a dimensão do embedding mudou (troca de modelo):
+        o índice é zerado, os lotes são descartados e quem chamou precisa
+        reindexar o long_term desde o id 0.
+        """
+        if not vecs:
+            return True
+        new_vecs, new_ids = np.vstack(vecs), np.concatenate(ids)
+        with self._lock:
+            self._load()
+            if len(self._ids) and self._matrix.shape[1] != new_vecs.shape[1]:
+                print("⚠️  [VectorMemory] Dimensão do embedding mudou — reindexando do zero.")
+                self._matrix = np.zeros((0, 0), dtype=np.float16)
+                self._ids    = np.zeros(0, dtype=np.int64)
+                self._save()
+                return False
+            if len(self._ids):
+                self._matrix = np.vstack([self._matrix, new_vecs])
+                self._ids    = np.concatenate([self._ids, new_ids])
+            else:
+                self._matrix, self._ids = new_vecs, new_ids
+            self._save()
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                status = getattr(getattr(e, "response", None), "status_code", None) or 0
+                if 400 <= status < 500:
+                    # Modelo não instalado / endpoint inexistente: não adianta insistir
+                    print(
+                        f"⚠️  [VectorMemory] Ollama recusou o embedding ({self.model}, HTTP {status}) "
+                        f"— índice semântico desligado."
+                    )
+                    self.enabled = False
+                    return
+                print(f"⚠️  [VectorMemory] Indexação falhou ({self.model}): {e}")
+                self._stop.wait(300)
+            self._wake.wait(600)
+            self._wake.clear()
+
+    def start(self):
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._loop, name="siaa-vector-memory", daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """Novas linhas no long_term: acorda o indexador."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Busca
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, k: int = 3) -> list[dict]:
+        """Top-k por cosseno acima de min_score: [{'score', 'date', 'time', 'content'}]."""
+        if not self.enabled:
+            return []
+        with self._lock:
+            self._load()
+            matrix, ids = self._matrix, self._ids
+        if not len(ids):
+            return []
+
+        try:
+            q = self._embed([query], "interactive")[0]
+        except Exception as e:
+            print(f"⚠️  [VectorMemory] Embedding da busca falhou: {e}")
+            return []
+        if q.shape[0] != matrix.shape[1]:
+            return []
+
+        scores = matrix.astype(np.float32) @ q
+        top    = min(k, len(scores))
+        idx    = np.argpartition(-scores, top - 1)[:top]
+        idx    = idx[np.argsort(-scores[idx])]
+        hits   = [(int(ids[i]), float(scores[i])) for i in idx if scores[i] >= self.min_score]
+        if not hits:
+            return []
+
+        with db.connect(self.mem.db_path) as conn:
+            rows = {
+                r[0]: r[1:] for r in conn.execute(
+                    f"SELECT id, date, time, content FROM long_term "
+                    f"WHERE id IN ({', '.join('?' * len(hits))})",
+                    [i for i, _ in hits],
+                )
+            }
+        missing = [i for i, _ in hits if i not in rows]
+        if missing:
+            rows.update(self.mem.archive.fetch(missing))
+        return [
+            {"score": score, "date": rows[i][0], "time": rows[i][1], "content": rows[i][2]}
+            for i, score in hits if i in rows   # linhas apagadas ficam de fora
+        ]
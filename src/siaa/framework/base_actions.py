@@ -1,30 +1,138 @@
-import sqlite3
 import re
+import threading
+from datetime import datetime
+
+from framework import db
+from framework.br_parser import to_iso
 from framework.shared_utils import tokenize, is_plural
 
 
+def br_dates_to_iso(table: str, column: str = "date"):
+    """
+    Migração: datas 'DD/MM/AAAA' → 'AAAA-MM-DD' (ordenável, comparável por
+    faixa). Converte também as formas soltas gravadas pelo LLM ('5/10',
+    '05/10/26'); o que não for data fica como está e vai para o log — não
+    entra em nenhum BETWEEN.
+    """
+    def migrate(conn):
+        rows = conn.execute(
+            f"SELECT id, {column} FROM {table} "
+            f"WHERE {column} NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+        ).fetchall()
+        converted, invalid = [], []
+        for id_, raw in rows:
+            iso = to_iso(raw)
+            if iso:
+                converted.append((iso, id_))
+            else:
+                invalid.append((id_, raw))
+        conn.executemany(f"UPDATE {table} SET {column} = ? WHERE id = ?", converted)
+        if invalid:
+            print(
+                f"⚠️ '{table}': {len(invalid)} data(s) fora do formato, mantidas como "
+                f"estão (id, {column}): {invalid[:20]}"
+            )
+    return migrate
+
+
 class BaseActions:
     """
     Camada de persistência base para módulos com banco SQLite.
     Cada módulo em modules/<nome>/actions.py herda desta classe.
+
+    Schema declarativo (atributos de classe na subclasse):
+        INDEXES    = {"idx_finance_date": "date, time"}
+        MIGRATIONS = [
+            (1, "ALTER TABLE finance ADD COLUMN category TEXT"),
+            (2, lambda conn: ...),          # migração de dados em Python
+        ]
+    Aplicados uma vez por processo (na primeira instância da tabela). A
+    versão de cada tabela fica em 'schema_version'; tabela criada agora já
+    nasce com o schema atual e é marcada direto na última versão.
     """
 
+    INDEXES: dict[str, str] = {}
+    MIGRATIONS: list[tuple] = []
+
+    # (db_path, tabela) já preparados neste processo
+    _ready      = set()
+    _ready_lock = threading.Lock()
+
     def __init__(self, db_path: str, table_name: str, schema: str):
         self.db_path = db_path
         self.table   = table_name
-        try:
-            self._ensure_table(schema)
-        except Exception as e:
-            print(f"❌ Erro ao criar tabela '{table_name}': {e}")
+
+        key = (db_path, table_name)
+        if key in BaseActions._ready:
+            return
+        with BaseActions._ready_lock:
+            if key in BaseActions._ready:
+                return
+            try:
+                created = self._ensure_table(schema)
+                self._migrate(created)
+                self._ensure_indexes()
+                self._setup()
+                BaseActions._ready.add(key)
+            except Exception as e:
+                print(f"❌ Erro ao preparar tabela '{table_name}': {e}")
 
     # ------------------------------------------------------------------
     # Setup
     # ------------------------------------------------------------------
 
-    def _ensure_table(self, schema: str):
-        with sqlite3.connect(self.db_path) as conn:
+    def _ensure_table(self, schema: str) -> bool:
+        """Cria a tabela se não existir. Retorna True se acabou de criar."""
+        with db.connect(self.db_path) as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,)
+            ).fetchone()
             conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({schema})")
-            conn.commit()
+        return not exists
+
+    def _migrate(self, created: bool):
+        """Aplica, em ordem, as MIGRATIONS com versão acima da gravada."""
+        latest = max((v for v, _ in self.MIGRATIONS), default=0)
+        with db.connect(self.db_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS schema_version "
+                "(table_name TEXT PRIMARY KEY, version INTEGER, updated_at TEXT)"
+            )
+            if created:
+                # Tabela nova já nasce com o schema atual
+                self._set_version(conn, latest)
+                return
+            row = conn.execute(
+                "SELECT version FROM schema_version WHERE table_name = ?", (self.table,)
+            ).fetchone()
+
+        current = row[0] if row else 0
+        for version, step in sorted(self.MIGRATIONS, key=lambda m: m[0]):
+            if version <= current:
+                continue
+            with db.transaction(self.db_path) as conn:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+                self._set_version(conn, version)
+            print(f"🔧 {type(self).__name__}: '{self.table}' migrada para a versão {version}.")
+
+    def _set_version(self, conn, version: int):
+        conn.execute(
+            "INSERT INTO schema_version (table_name, version, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(table_name) DO UPDATE SET "
+            "version = excluded.version, updated_at = excluded.updated_at",
+            (self.table, version, datetime.now().isoformat(timespec="seconds")),
+        )
+
+    def _ensure_indexes(self):
+        with db.connect(self.db_path) as conn:
+            for name, columns in self.INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {self.table} ({columns})")
+
+    def _setup(self):
+        """Hook para estruturas extras da tabela (FTS, triggers). Roda uma vez por processo."""
 
     # ------------------------------------------------------------------
     # CRUD
@@ -35,7 +143,7 @@ class BaseActions:
             columns      = ", ".join(data.keys())
             placeholders = ", ".join(["?"] * len(data))
             values       = tuple(data.values())
-            with sqlite3.connect(self.db_path) as conn:
+            with db.connect(self.db_path) as conn:
                 conn.execute(
                     f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders})",
                     values,
@@ -50,7 +158,7 @@ class BaseActions:
         try:
             if not ids:
                 return False
-            with sqlite3.connect(self.db_path) as conn:
+            with db.connect(self.db_path) as conn:
                 if isinstance(ids, (list, tuple)):
                     placeholders = ", ".join(["?"] * len(ids))
                     conn.execute(
@@ -66,9 +174,8 @@ class BaseActions:
 
     def list_all(self, limit: int = 10) -> list[dict]:
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                rows = conn.execute(
+            with db.connect(self.db_path) as conn:
+                rows = db.dict_cursor(conn).execute(
                     f"SELECT * FROM {self.table} ORDER BY id DESC LIMIT ?", (limit,)
                 ).fetchall()
             return [dict(r) for r in rows]
@@ -90,9 +197,8 @@ class BaseActions:
             return []
 
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                rows = conn.execute(
+            with db.connect(self.db_path) as conn:
+                rows = db.dict_cursor(conn).execute(
                     f"SELECT * FROM {self.table} ORDER BY id DESC LIMIT 50"
                 ).fetchall()
 
@@ -0,0 +1,504 @@
+"""
+framework/br_parser.py
+
+Parser determinístico de expressões pt-BR (valores e datas).
+
+Roda em microssegundos e resolve os casos comuns ("gastei 35,90 no
+mercado hoje", "uber 45 reais ontem") sem chamar o LLM. Cada resultado
+vem com uma confiança — abaixo do limiar o chamador cai no LLM.
+"""
+
+import re
+from datetime import datetime, timedelta
+
+
+# ------------------------------------------------------------------
+# Valores monetários
+# ------------------------------------------------------------------
+
+# 1.500,00 | 1500 | 35,90 | 35.90 | R$ 35 | 45 reais | 30 conto | 2 mil | 2k
+_MONEY_RE = re.compile(
+    r"(?<![\w/:.,])"
+    r"(?P<prefix>r\$\s*)?"
+    r"(?P<num>\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:[.,]\d{1,2})?)"
+    r"(?![\d/:]|[.,]\d)"
+    r"(?P<suffix>\s*(?:mil\b|k\b))?"
+    r"(?P<unit>\s*(?:reais|real|contos?|pilas?|paus?)\b)?",
+    re.IGNORECASE,
+)
+
+# Números que NÃO são dinheiro: horários (10h, 10:30) e dias ("dia 15")
+_NOT_MONEY_AFTER  = re.compile(r"\s*(?:h\b|hs\b|hrs?\b|horas?\b|min\b|x\b|%)", re.IGNORECASE)
+_NOT_MONEY_BEFORE = re.compile(r"\b(?:dia|às|as|ás)\s*$", re.IGNORECASE)
+
+
+def _to_float(num: str) -> float:
+    if "," in num:                       # 1.500,00 | 35,90
+        return float(num.replace(".", "").replace(",", "."))
+    if re.fullmatch(r"\d{1,3}(?:\.\d{3})+", num):  # 1.500
+        return float(num.replace(".", ""))
+    return float(num)                    # 1500 | 35.90
+
+
+def find_amounts(text: str) -> list[dict]:
+    """
+    Lista os candidatos a valor monetário do texto.
+    Cada item: {"value": float, "strong": bool, "span": (ini, fim)}
+    strong=True quando há marcador de moeda (R$, reais, conto, mil...).
+    """
+    found = []
+    for m in _MONEY_RE.finditer(text):
+        if _NOT_MONEY_AFTER.match(text, m.end("num")) and not m.group("unit"):
+            continue
+        if _NOT_MONEY_BEFORE.search(text[: m.start()]) and not m.group("prefix"):
+            continue
+
+        value = _to_float(m.group("num"))
+        if m.group("suffix"):
+            value *= 1000
+
+        found.append({
+            "value":  value,
+            "strong": bool(m.group("prefix") or m.group("unit") or m.group("suffix")),
+            "span":   m.span(),
+        })
+    return found
+
+
+def parse_money(text: str, amounts: list[dict] = None) -> tuple[float | None, float]:
+    """
+    Retorna (valor, confiança). Um único candidato, ou um único com
+    marcador de moeda entre vários, é confiável; o resto é ambíguo.
+    """
+    amounts = find_amounts(text) if amounts is None else amounts
+    if not amounts:
+        return None, 0.0
+
+    strong = [a for a in amounts if a["strong"]]
+    if len(strong) == 1:
+        return strong[0]["value"], 0.95
+    if len(amounts) == 1:
+        return amounts[0]["value"], 0.85
+    return amounts[0]["value"], 0.3
+
+
+# ------------------------------------------------------------------
+# Datas e horários
+# ------------------------------------------------------------------
+
+_WEEKDAYS = {
+    "segunda": 0, "terça": 1, "terca": 1, "quarta": 2, "quinta": 3,
+    "sexta": 4, "sábado": 5, "sabado": 5, "domingo": 6,
+}
+
+_WEEKDAY_RE     = re.compile(
+    r"\b(segunda|ter[çc]a|quarta|quinta|sexta|s[áa]bado|domingo)(?:[\s-]feira)?(\s+que\s+vem)?\b"
+)
+_NEXT_WEEK_RE   = re.compile(r"\b(?:semana\s+que\s+vem|pr[óo]xima\s+semana)\b")
+_DAY_AFTER_RE   = re.compile(r"\bdepois\s+de\s+amanh[ãa]\b")
+_BEFORE_YEST_RE = re.compile(r"\banteontem\b")
+_TODAY_RE       = re.compile(r"\b(?:hoje|hj|agora)\b")
+_TOMORROW_RE    = re.compile(r"\bamanh[ãa]\b")
+_YESTERDAY_RE   = re.compile(r"\bontem\b")
+_FULL_DATE_RE   = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b")
+_SHORT_DATE_RE  = re.compile(r"\b(\d{1,2})/(\d{1,2})\b(?!/)")
+_DAY_OF_MONTH_RE = re.compile(r"\bdia\s+(\d{1,2})\b")
+
+_NOON_RE       = re.compile(r"\bmeio[\s-]dia\b")
+_MIDNIGHT_RE   = re.compile(r"\bmeia[\s-]noite\b")
+_HH_MM_RE      = re.compile(r"\b(\d{1,2}):(\d{2})\b")
+_HH_H_RE       = re.compile(r"\b(\d{1,2})\s?h(?:s|rs?)?(\d{2})?\b")
+_PERIOD_RE     = re.compile(r"\b(\d{1,2})\s+(?:da|de)\s+(manh[ãa]|tarde|noite)\b")
+_AT_HOUR_RE    = re.compile(r"\b(?:[àáa]s|a)\s+(\d{1,2})\b(?![/:,.\d])")
+_NOW_RE        = re.compile(r"\bagora\b")
+
+# Trechos de data/hora removidos na hora de montar o título
+_DATE_WORDS_RE = re.compile(
+    r"\b(?:hoje|hj|ontem|anteontem|depois\s+de\s+amanh[ãa]|amanh[ãa]|"
+    r"(?:esse|este|nesse|neste)\s+m[êe]s|"
+    r"(?:semana\s+que\s+vem|pr[óo]xima\s+semana|da\s+semana\s+que\s+vem)|"
+    r"(?:(?:na|no|nesta|nessa|neste|nesse|esta|essa|este|esse|pr[óo]xim[ao])\s+)?"
+    r"(?:segunda|ter[çc]a|quarta|quinta|sexta|s[áa]bado|domingo)(?:[\s-]feira)?(?:\s+que\s+vem)?|"
+    r"dia\s+\d{1,2}|\d{1,2}/\d{1,2}(?:/\d{2,4})?|"
+    r"(?:[àáa]s\s+|ao\s+)?(?:meio[\s-]dia|meia[\s-]noite)|"
+    r"(?:[àáa]s\s+)?\d{1,2}\s+(?:da|de)\s+(?:manh[ãa]|tarde|noite)|"
+    r"(?:[àáa]s\s+)?\d{1,2}(?::\d{2}|\s?h(?:s|rs?)?\d{0,2})|"
+    r"[àáa]s\s+\d{1,2}(?![/:,.\d])|"
+    r"cedo|agora|de\s+manh[ãa]|[àa]\s+tarde|[àa]\s+noite)\b",
+    re.IGNORECASE,
+)
+
+
+def _fmt(d: datetime) -> str:
+    return d.strftime("%d/%m/%Y")
+
+
+_LOOSE_BR_DATE_RE = re.compile(r"^\s*(\d{1,2})/(\d{1,2})(?:/(\d{4}|\d{2}))?\s*$")
+
+
+def to_iso(date_br: str, year: int = None) -> str | None:
+    """
+    DD/MM/AAAA (parser, usuário) → AAAA-MM-DD (gravado no banco, ordenável).
+    Aceita também as formas soltas que o LLM devolve: '5/10', '05/10/26'
+    (sem ano → 'year', padrão o ano atual).
+    None se não é uma data ou ela não existe ('dia 31' num mês de 30 dias → 31/09).
+    """
+    m = _LOOSE_BR_DATE_RE.match(date_br or "")
+    if not m:
+        return None
+    day, month, y = int(m.group(1)), int(m.group(2)), m.group(3)
+    if y is None:
+        y = year or datetime.now().year
+    elif len(y) == 2:
+        y = 2000 + int(y)
+    try:
+        return datetime(int(y), month, day).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def to_br(date_iso: str) -> str:
+    """AAAA-MM-DD (banco) → DD/MM/AAAA (exibição). Outro formato volta como veio."""
+    try:
+        return datetime.strptime(date_iso, "%Y-%m-%d").strftime("%d/%m/%Y")
+    except (TypeError, ValueError):
+        return date_iso
+
+
+def _weekday_date(wd: int, now: datetime, prefer: str, next_week: bool,
+                  time_str: str | None) -> datetime:
+    if next_week:
+        monday = now - timedelta(days=now.weekday()) + timedelta(days=7)
+        return monday + timedelta(days=wd)
+    if prefer == "past":
+        return now - timedelta(days=(now.weekday() - wd) % 7)
+    delta = (wd - now.weekday()) % 7
+    # "sexta 14h" dito numa sexta de manhã → hoje; sem hora ou já passou → semana que vem
+    if delta == 0 and not (time_str and time_str > now.strftime("%H:%M")):
+        delta = 7
+    return now + timedelta(days=delta)
+
+
+def parse_date(text: str, now: datetime = None, prefer: str = "future") -> str | None:
+    """
+    Extrai uma data da mensagem.
+    Suporta: 'hoje'/'hj'/'agora', 'ontem', 'anteontem', 'amanhã',
+    'depois de amanhã', dias da semana ('segunda que vem' = a segunda
+    depois da próxima), 'semana que vem', 'DD/MM',
+    'DD/MM/AAAA', 'dia DD'. Retorna DD/MM/AAAA ou None.
+
+    prefer: 'future' (agenda — "quinta" é a próxima quinta) ou
+            'past' (gastos e consultas — "quinta" é a última quinta).
+    """
+    msg = text.lower()
+    now = now or datetime.now()
+
+    if _BEFORE_YEST_RE.search(msg):
+        return _fmt(now - timedelta(days=2))
+
+    if _DAY_AFTER_RE.search(msg):
+        return _fmt(now + timedelta(days=2))
+
+    if _TODAY_RE.search(msg):
+        return _fmt(now)
+
+    if _TOMORROW_RE.search(msg):
+        return _fmt(now + timedelta(days=1))
+
+    if _YESTERDAY_RE.search(msg):
+        return _fmt(now - timedelta(days=1))
+
+    m = _FULL_DATE_RE.search(msg)
+    if m:
+        return f"{int(m.group(1)):02d}/{int(m.group(2)):02d}/{m.group(3)}"
+
+    # DD/MM (assume ano atual)
+    m = _SHORT_DATE_RE.search(msg)
+    if m and 1 <= int(m.group(2)) <= 12:
+        return f"{int(m.group(1)):02d}/{int(m.group(2)):02d}/{now.year}"
+
+    # "dia DD": mês atual, ou o seguinte/anterior se o dia já passou/ainda não chegou
+    m = _DAY_OF_MONTH_RE.search(msg)
+    if m:
+        day   = int(m.group(1))
+        month = now.replace(day=1)
+        if prefer == "future" and day < now.day:
+            month = (month + timedelta(days=32)).replace(day=1)
+        elif prefer == "past" and day > now.day:
+            month = (month - timedelta(days=1)).replace(day=1)
+        return f"{day:02d}/{month.strftime('%m/%Y')}"
+
+    next_week = bool(_NEXT_WEEK_RE.search(msg))
+    m = _WEEKDAY_RE.search(msg)
+    if m:
+        wd   = _WEEKDAYS[m.group(1)]
+        time = parse_time(msg)
+        if m.group(2):
+            # "segunda que vem": pula a próxima segunda, é a da outra semana
+            return _fmt(_weekday_date(wd, now, "future", False, time) + timedelta(days=7))
+        return _fmt(_weekday_date(wd, now, prefer, next_week, time))
+
+    if next_week:
+        return _fmt(now + timedelta(days=7))
+
+    return None
+
+
+_MONTHS = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4,
+    "maio": 5, "junho": 6, "julho": 7, "agosto": 8, "setembro": 9,
+    "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+_LAST_WEEK_RE    = re.compile(r"\bsemana\s+passada\b")
+_THIS_WEEK_RE    = re.compile(r"\b(?:ess?a|esta|nessa|nesta)\s+semana\b")
+_LAST_WEEKEND_RE = re.compile(r"\bfi(?:m|nal)\s+de\s+semana(?:\s+passado)?\b")
+_LAST_MONTH_RE   = re.compile(r"\bm[êe]s\s+passado\b")
+_THIS_MONTH_RE   = re.compile(r"\b(?:ess?e|este|nesse|neste)\s+m[êe]s\b")
+_LAST_YEAR_RE    = re.compile(r"\bano\s+passado\b")
+_THIS_YEAR_RE    = re.compile(r"\b(?:ess?e|este|nesse|neste)\s+ano\b")
+_LAST_N_RE       = re.compile(r"\b[úu]ltim[oa]s\s+(\d{1,3})\s+(dias?|semanas?|m[êe]s(?:es)?)\b")
+_MONTH_NAME_RE   = re.compile(
+    r"\b(janeiro|fevereiro|mar[çc]o|abril|maio|junho|julho|agosto|setembro|"
+    r"outubro|novembro|dezembro)(?:\s+de\s+(\d{4}))?\b"
+)
+
+
+def _month_range(year: int, month: int) -> tuple[datetime, datetime]:
+    first = datetime(year, month, 1)
+    nxt   = (first + timedelta(days=32)).replace(day=1)
+    return first, nxt - timedelta(days=1)
+
+
+def parse_date_range(text: str, now: datetime = None) -> tuple[str, str] | None:
+    """
+    Extrai um período do passado da mensagem (consultas à memória).
+    Suporta: 'semana passada', 'essa semana', 'fim de semana', 'mês passado',
+    'esse mês', 'ano passado', 'esse ano', 'últimos N dias/semanas/meses',
+    nomes de mês ('em março', 'março de 2025') e, como último recurso,
+    qualquer dia do parse_date (início = fim).
+    Retorna (início, fim) em DD/MM/AAAA, inclusivos, ou None.
+    """
+    msg   = text.lower()
+    now   = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    monday = today - timedelta(days=today.weekday())
+
+    if _LAST_WEEK_RE.search(msg):
+        start = monday - timedelta(days=7)
+        return _fmt(start), _fmt(start + timedelta(days=6))
+
+    if _THIS_WEEK_RE.search(msg):
+        return _fmt(monday), _fmt(today)
+
+    if _LAST_WEEKEND_RE.search(msg):
+        # Domingo já passou: o fim de semana mais recente
+        saturday = monday - timedelta(days=2) if today.weekday() < 5 else monday + timedelta(days=5)
+        return _fmt(saturday), _fmt(min(saturday + timedelta(days=1), today))
+
+    if _LAST_MONTH_RE.search(msg):
+        prev = today.replace(day=1) - timedelta(days=1)
+        return tuple(_fmt(d) for d in _month_range(prev.year, prev.month))
+
+    if _THIS_MONTH_RE.search(msg):
+        return _fmt(today.replace(day=1)), _fmt(today)
+
+    if _LAST_YEAR_RE.search(msg):
+        return f"01/01/{today.year - 1}", f"31/12/{today.year - 1}"
+
+    if _THIS_YEAR_RE.search(msg):
+        return f"01/01/{today.year}", _fmt(today)
+
+    m = _LAST_N_RE.search(msg)
+    if m:
+        n, unit = int(m.group(1)), m.group(2)
+        days    = n * (7 if unit.startswith("semana") else 30 if unit.startswith("m") else 1)
+        return _fmt(today - timedelta(days=days - 1)), _fmt(today)
+
+    m = _MONTH_NAME_RE.search(msg)
+    if m:
+        month = _MONTHS[m.group(1)]
+        # Sem ano: o último março que já começou
+        year  = int(m.group(2)) if m.group(2) else today.year - (month > today.month)
+        start, end = _month_range(year, month)
+        return _fmt(start), _fmt(min(end, today))
+
+    day = parse_date(msg, now, prefer="past")
+    return (day, day) if day else None
+
+
+def parse_time(text: str, now: datetime = None) -> str | None:
+    """
+    Extrai um horário da mensagem: '09:00', '10h', '10h30', 'às 10',
+    '8 da noite', 'meio dia', 'meia noite', 'agora'. Retorna HH:MM ou None.
+    """
+    msg = text.lower()
+
+    if _NOON_RE.search(msg):
+        return "12:00"
+    if _MIDNIGHT_RE.search(msg):
+        return "00:00"
+
+    hour, minute = None, 0
+
+    m = _HH_MM_RE.search(msg)
+    if m:
+        hour, minute = int(m.group(1)), int(m.group(2))
+    else:
+        m = _HH_H_RE.search(msg)
+        if m:
+            hour, minute = int(m.group(1)), int(m.group(2) or 0)
+        else:
+            m = _PERIOD_RE.search(msg)
+            if m:
+                hour = int(m.group(1))
+                if m.group(2) in ("tarde", "noite") and hour < 12:
+                    hour += 12
+            else:
+                m = _AT_HOUR_RE.search(msg)
+                if m:
+                    hour = int(m.group(1))
+
+    if hour is None:
+        if _NOW_RE.search(msg):
+            return (now or datetime.now()).strftime("%H:%M")
+        return None
+
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+# ------------------------------------------------------------------
+# Título (o que sobra da mensagem)
+# ------------------------------------------------------------------
+
+# Verbos e muletas de comando que abrem a frase
+_LEADING_FILLERS = {
+    "anota", "anotar", "anote", "ai", "aí", "q", "que", "gastei", "paguei",
+    "comprei", "gasto", "gastos", "mais", "foi", "fiz", "registra", "registrar",
+    "lança", "lanca", "lançar", "coloca", "põe", "poe", "tive", "torrei",
+}
+
+# Idem para comandos de agenda ("marca uma call", "lembra de ligar")
+_AGENDA_FILLERS = {
+    "marca", "marcar", "marque", "agenda", "agendar", "agende", "coloca",
+    "coloque", "adiciona", "adicionar", "adicione", "cria", "criar", "crie",
+    "anota", "anotar", "anote", "lembra", "lembrar", "lembre", "bloqueia",
+    "reserva", "tem", "tenho", "vai", "ter", "ai", "aí", "me", "mim",
+}
+
+# Palavras de ligação que não podem abrir/fechar nem se repetir no título
+_CONNECTORS = {
+    "de", "do", "da", "dos", "das", "no", "na", "nos", "nas", "em", "pro",
+    "pra", "para", "pelo", "pela", "com", "o", "a", "os", "as", "um", "uma",
+    "e", "q", "que", "mim",
+}
+
+
+def leftover_title(
+    text: str, spans: list[tuple], max_words: int = 4, fillers: set = _LEADING_FILLERS
+) -> str:
+    """
+    Remove os trechos já interpretados (valor, data) e as muletas de
+    comando, devolvendo o núcleo da frase como título.
+    """
+    # Trechos removidos viram um marcador para saber onde havia algo
+    chars = list(text)
+    for ini, fim in spans:
+        chars[ini:fim] = "\x00".ljust(fim - ini)
+    cleaned = _DATE_WORDS_RE.sub(" \x00 ", "".join(chars))
+    cleaned = re.sub(r"\b(?:r\$|reais|real|contos?|pilas?|paus?)\b|r\$", " \x00 ", cleaned, flags=re.IGNORECASE)
+
+    tokens = re.findall(r"[\wÀ-ÿ]+|\x00", cleaned)
+
+    # Conector que ficou colado em outro após uma remoção
+    # ("pix de <200> pro joao") → mantém só o último
+    words = []
+    for i, w in enumerate(tokens):
+        if w == "\x00":
+            continue
+        after = [t for t in tokens[i + 1:] if t != "\x00"]
+        if (
+            w.lower() in _CONNECTORS
+            and i + 1 < len(tokens) and tokens[i + 1] == "\x00"
+            and after and after[0].lower() in _CONNECTORS
+        ):
+            continue
+        words.append(w)
+
+    while words and (words[0].lower() in fillers or words[0].lower() in _CONNECTORS):
+        words.pop(0)
+    while words and words[-1].lower() in _CONNECTORS:
+        words.pop()
+
+    title = " ".join(words[:max_words])
+    return title[:1].upper() + title[1:]
+
+
+# ------------------------------------------------------------------
+# Finanças
+# ------------------------------------------------------------------
+
+def parse_finance(message: str, now: datetime = None) -> dict:
+    """
+    Extrai valor, título e data de uma mensagem de gasto.
+    Retorna {"amount", "desc", "date", "confidence"}; amount/desc podem
+    ser None/"" quando não identificados (confiança baixa).
+    """
+    now     = now or datetime.now()
+    amounts = find_amounts(message)
+    amount, confidence = parse_money(message, amounts)
+
+    desc    = leftover_title(message, [a["span"] for a in amounts])
+    date    = parse_date(message, now, prefer="past") or now.strftime("%d/%m/%Y")
+
+    if amount is None or amount <= 0:
+        confidence = 0.0
+    elif not desc:
+        confidence = min(confidence, 0.4)
+
+    return {
+        "amount":     amount,
+        "desc":       desc,
+        "date":       date,
+        "confidence": confidence,
+    }
+
+
+# ------------------------------------------------------------------
+# Agenda
+# ------------------------------------------------------------------
+
+_RECURRING_RE = re.compile(r"\b(?:tod[ao]s?|recorrente|semanal|mensal)\b")
+_FOR_ME_RE    = re.compile(r"\b(?:pra|para)\s+mim\b|\b(?:na\s+)?minha\s+agenda\b", re.IGNORECASE)
+
+
+def parse_agenda(message: str, now: datetime = None) -> dict:
+    """
+    Extrai evento, data e hora de uma mensagem de compromisso.
+    Retorna {"title", "date", "time", "confidence"}; date/time ficam
+    None quando não aparecem na frase.
+    """
+    now   = now or datetime.now()
+    time_ = parse_time(message, now)
+    date  = parse_date(message, now, prefer="future")
+
+    cleaned = _FOR_ME_RE.sub(" ", message)
+    title   = leftover_title(cleaned, [], max_words=6, fillers=_AGENDA_FILLERS)
+
+    if not title or not (date or time_):
+        confidence = 0.3
+    elif _RECURRING_RE.search(message.lower()):
+        confidence = 0.5  # recorrência: deixa o LLM decidir
+    elif date and time_:
+        confidence = 0.95
+    else:
+        confidence = 0.85
+
+    return {
+        "title":      title,
+        "date":       date,
+        "time":       time_,
+        "confidence": confidence,
+    }
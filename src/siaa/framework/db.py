@@ -0,0 +1,97 @@
+"""
+framework/db.py
+
+Conexões SQLite reutilizadas por thread.
+
+Cada método do BaseActions abria um sqlite3.connect novo (abrir o
+arquivo, ler o schema, montar o cache de páginas) — e uma mensagem
+passa por vários deles. Aqui cada thread abre UMA conexão por banco e
+reaproveita, já com os pragmas:
+
+  journal_mode=WAL      leitores não bloqueiam o escritor (o worker de
+                        memória grava enquanto o chat lê)
+  synchronous=NORMAL    fsync só no checkpoint do WAL — seguro contra
+                        queda do processo, perde no máximo as últimas
+                        transações numa queda de energia
+  mmap_size             leituras direto do page cache do SO
+  cache_size            cache de páginas por conexão
+  busy_timeout          espera o lock em vez de falhar na hora
+
+Uso (igual ao sqlite3.connect: o 'with' faz commit ou rollback, mas a
+conexão continua aberta para a próxima chamada):
+
+    with db.connect(self.db_path) as conn:
+        conn.execute("INSERT ...")
+
+    with db.transaction(self.db_path) as conn:   # várias escritas, um commit
+        ...
+
+    rows = db.dict_cursor(conn).execute("SELECT ...").fetchall()   # dict(r)
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 67108864",   # 64 MB
+    "PRAGMA cache_size = -8192",     # 8 MB (negativo = KiB)
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+_local = threading.local()
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Conexão desta thread para db_path (aberta na primeira chamada)."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=5)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        conns[db_path] = conn
+    return conn
+
+
+@contextmanager
+def transaction(db_path: str):
+    """
+    Bloco transacional explícito: BEGIN IMMEDIATE (pega o lock de escrita
+    já no início, sem upgrade no meio), commit no fim, rollback em erro.
+    """
+    conn = connect(db_path)
+    if conn.in_transaction:
+        # Já dentro de uma transação desta thread: junta-se a ela
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def dict_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Cursor com linhas sqlite3.Row, sem mudar o row_factory da conexão compartilhada."""
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+    return cur
+
+
+def close(db_path: str | None = None):
+    """Fecha as conexões desta thread (todas, ou só a de db_path)."""
+    conns = getattr(_local, "conns", {})
+    for path in [db_path] if db_path else list(conns):
+        conn = conns.pop(path, None)
+        if conn is not None:
+            conn.close()
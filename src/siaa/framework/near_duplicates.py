@@ -0,0 +1,95 @@
+"""
+framework/near_duplicates.py
+
+Detecção de quase-duplicatas por shingling + MinHash.
+
+Os fatos do actual_context repetem o mesmo assunto com palavras
+diferentes ("[17/10] Usuário gosta de café" / "[18/10] O usuário gosta
+muito de café"). Comparar por igualdade não pega; mandar tudo para o LLM
+condensar custa uma chamada. Aqui cada linha perde as palavras que não
+carregam o fato (artigos, preposições, "usuário", "muito"...), vira um
+conjunto de shingles (4 caracteres) e uma assinatura MinHash; a fração
+de posições iguais entre duas assinaturas estima a similaridade de
+Jaccard. Os dois exemplos acima viram "gosta cafe" e se fundem; "gosta
+de chá" fica em ~0.5 e não.
+
+Uso:
+    dedupe(linhas)                          → sem as repetições (fica a mais nova)
+    similarity(signature(a), signature(b))  → Jaccard estimado entre a e b
+"""
+
+import re
+import unicodedata
+import zlib
+
+_NUM_PERM  = 64
+_PRIME     = (1 << 61) - 1
+_MAX_HASH  = (1 << 32) - 1
+
+# Coeficientes fixos: assinaturas comparáveis entre execuções
+_PERMS = [
+    ((i * 0x9E3779B1 + 0x7F4A7C15) % _PRIME | 1, (i * 0x85EBCA77 + 0xC2B2AE3D) % _PRIME)
+    for i in range(1, _NUM_PERM + 1)
+]
+
+# "[17/10] " no começo da linha não conta para a comparação
+_DATE_PREFIX_RE = re.compile(r"^\s*\[[^\]]*\]\s*")
+
+# Palavras que não mudam o fato (já sem acento, como o normalize deixa)
+_FILLERS = {
+    "a", "o", "as", "os", "e", "de", "do", "da", "dos", "das", "em", "no", "na",
+    "nos", "nas", "um", "uma", "uns", "umas", "por", "para", "pra", "pro", "com",
+    "ao", "aos", "pelo", "pela", "pelos", "pelas", "num", "numa", "que", "se",
+    "ele", "ela", "seu", "sua", "seus", "suas", "usuario", "usuaria",
+    "muito", "muita", "bastante", "bem", "tambem", "sempre", "ainda", "agora",
+}
+
+DEFAULT_THRESHOLD = 0.7
+
+
+def normalize(text: str) -> str:
+    text = _DATE_PREFIX_RE.sub("", text.lower())
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(w for w in re.findall(r"\w+", text) if w not in _FILLERS)
+
+
+def shingles(text: str, k: int = 4) -> set[str]:
+    text = normalize(text)
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def signature(text: str) -> tuple[int, ...] | None:
+    """Assinatura MinHash (None para texto vazio)."""
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(text)]
+    if not hashes:
+        return None
+    return tuple(
+        min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMS
+    )
+
+
+def similarity(a: tuple | None, b: tuple | None) -> float:
+    """Jaccard estimado entre duas assinaturas."""
+    if a is None or b is None:
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / _NUM_PERM
+
+
+def dedupe(lines: list[str], threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """
+    Remove quase-duplicatas mantendo a ocorrência MAIS NOVA (a última da
+    lista) na posição dela — um fato atualizado substitui o antigo.
+    """
+    kept, sigs = [], []
+    for line in reversed(lines):
+        sig = signature(line)
+        if sig is None or any(similarity(sig, s) >= threshold for s in sigs):
+            continue
+        kept.append(line)
+        sigs.append(sig)
+    kept.reverse()
+    return kept
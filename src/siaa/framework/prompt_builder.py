@@ -0,0 +1,182 @@
+"""
+prompt_builder.py — Montagem de prompts com orçamento em tokens.
+
+Antes os prompts eram cortados por caracteres (history[-300:]), o que
+partia palavras e turnos no meio e não tinha relação com a janela real
+do modelo. Aqui:
+
+  1. TokenCounter estima tokens por chars/token, calibrado com o
+     prompt_eval_count que o Ollama devolve (MemoryManager alimenta)
+  2. O orçamento é a janela (num_ctx) menos a saída reservada
+     (num_predict do perfil) e o contexto situacional
+  3. Cada parte do prompt tem prioridade e um modo de corte:
+       None    → fixa (instruções, mensagem atual) — nunca cortada
+       "turns" → histórico: descarta turnos inteiros, os mais antigos
+       "lines" → memórias/registros: descarta linhas inteiras
+     As partes recebem orçamento em ordem de prioridade (0 = primeiro)
+     e voltam na ordem em que foram adicionadas.
+  4. Uma parte pode vir já montada, com o tamanho conhecido (as camadas
+     de memória cacheadas pelo MemoryManager): se couber, entra inteira
+     sem recontar nem cortar; se não, é cortada como as outras.
+
+Uso (a partir de uma entity):
+    pb = self.mem.prompt_builder("chat")
+    pb.add("Instruções...\\n")
+    pb.add(history, priority=1, trim="turns", max_tokens=150, prefix="[HISTÓRICO]\\n")
+    pb.add(f"Mensagem: {message}")
+    prompt = pb.build()
+"""
+
+import math
+import re
+import threading
+
+
+# Início de um turno: linha "Nome: ..." (o formato que o app.py acumula)
+_TURN_RE = re.compile(r"\n(?=[^\n:]{1,40}: )")
+
+# Janela padrão enquanto o MemoryManager não chamou configure()
+_DEFAULT_WINDOW  = 4096
+_DEFAULT_RESERVE = 512
+
+
+class TokenCounter:
+    """Estimador chars→tokens com calibração por EWMA."""
+
+    # Fora disso a amostra é descartada: razões altas indicam que o Ollama
+    # reaproveitou o prefixo em cache e só avaliou parte do prompt
+    _MIN_RATIO, _MAX_RATIO = 1.5, 6.0
+
+    def __init__(self, chars_per_token: float = 4.0, alpha: float = 0.1):
+        self.chars_per_token = chars_per_token
+        self.alpha           = alpha
+        self.samples         = 0
+        self._lock           = threading.Lock()
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def calibrate(self, chars: int, tokens: int):
+        """Uma amostra real: len(prompt) → prompt_eval_count."""
+        if tokens < 32:
+            return
+        ratio = chars / tokens
+        if not self._MIN_RATIO <= ratio <= self._MAX_RATIO:
+            return
+        with self._lock:
+            self.chars_per_token += self.alpha * (ratio - self.chars_per_token)
+            self.samples         += 1
+
+    def stats(self) -> dict:
+        return {"chars_per_token": round(self.chars_per_token, 2), "samples": self.samples}
+
+
+counter = TokenCounter()
+window  = _DEFAULT_WINDOW
+
+
+def configure(num_ctx: int):
+    """Janela do modelo (chamado pelo MemoryManager com o num_ctx em uso)."""
+    global window
+    window = num_ctx
+
+
+def _units(text: str, trim: str, turn_start: str | None = None) -> list[str]:
+    text = text.strip("\n")
+    if trim == "turns":
+        # turn_start (ex: "Usuário:") agrupa pergunta + resposta num turno só
+        pattern = re.compile(r"\n(?=" + re.escape(turn_start) + ")") if turn_start else _TURN_RE
+        return pattern.split(text)
+    return text.split("\n")
+
+
+def fit(
+    text: str, max_tokens: int, trim: str = "lines", keep: str = "tail",
+    turn_start: str | None = None,
+) -> str:
+    """
+    Corta 'text' em unidades inteiras (turnos ou linhas) até caber em
+    max_tokens. keep='tail' preserva o fim (mais recente), 'head' o início.
+    """
+    if counter.count(text) <= max_tokens:
+        return text
+
+    units = _units(text, trim, turn_start)
+    order = reversed(units) if keep == "tail" else iter(units)
+    kept, used = [], 0
+    for unit in order:
+        cost = counter.count(unit) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(unit)
+        used += cost
+    if keep == "tail":
+        kept.reverse()
+    return "\n".join(kept)
+
+
+class PromptBuilder:
+    def __init__(self, budget: int | None = None, reserve: int = _DEFAULT_RESERVE):
+        """budget: tokens disponíveis para o prompt (padrão: janela - reserve)."""
+        self.budget = budget if budget is not None else window - reserve
+        self._parts = []
+
+    def add(
+        self, text: str, priority: int = 0, trim: str | None = None,
+        keep: str = "tail", max_tokens: int | None = None, prefix: str = "",
+        turn_start: str | None = None, rendered: str | None = None,
+        tokens: int | None = None,
+    ) -> "PromptBuilder":
+        """
+        prefix: cabeçalho da parte, só incluído se sobrar algo dela.
+        max_tokens: teto próprio da parte, além do orçamento global.
+        turn_start: com trim='turns', prefixo da linha que abre um turno.
+        rendered/tokens: a parte inteira já montada e o tamanho dela
+                         (ex: MemoryManager.context_layers()).
+        """
+        self._parts.append({
+            "text": text or "", "priority": priority, "trim": trim,
+            "keep": keep, "max_tokens": max_tokens, "prefix": prefix,
+            "turn_start": turn_start, "rendered": rendered, "tokens": tokens,
+        })
+        return self
+
+    @staticmethod
+    def _whole(part: dict) -> tuple[str, int]:
+        """A parte inteira e o tamanho dela (o pré-montado, se houver)."""
+        if part["rendered"] is not None and part["tokens"] is not None:
+            return part["rendered"], part["tokens"]
+        text = part["prefix"] + part["text"]
+        return text, counter.count(text)
+
+    def build(self) -> str:
+        fixed     = [p for p in self._parts if p["trim"] is None]
+        rendered  = {id(p): self._whole(p)[0] for p in fixed}
+        remaining = self.budget - sum(self._whole(p)[1] for p in fixed)
+
+        for part in sorted(
+            (p for p in self._parts if p["trim"] is not None), key=lambda p: p["priority"]
+        ):
+            if part["tokens"] is not None and part["rendered"] is not None:
+                cap = remaining if part["max_tokens"] is None else min(remaining, part["max_tokens"])
+                if part["tokens"] <= cap:
+                    rendered[id(part)] = part["rendered"]
+                    remaining -= part["tokens"]
+                    continue
+
+            allowance = remaining - counter.count(part["prefix"])
+            if part["max_tokens"] is not None:
+                allowance = min(allowance, part["max_tokens"])
+
+            body = fit(
+                part["text"], max(allowance, 0), part["trim"], part["keep"], part["turn_start"]
+            )
+            text = part["prefix"] + body if body.strip() else ""
+            rendered[id(part)] = text
+            remaining -= counter.count(text)
+
+        if remaining < 0:
+            print(f"⚠️  [PromptBuilder] Partes fixas estouram o orçamento em {-remaining} tokens.")
+        return "".join(rendered[id(p)] for p in self._parts)
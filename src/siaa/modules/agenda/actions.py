@@ -1,12 +1,31 @@
-import re
-import sqlite3
 from datetime import datetime
 
-from framework.base_actions import BaseActions
+from framework import db
+from framework.base_actions import BaseActions, br_dates_to_iso
+from framework.br_parser import parse_agenda, to_iso
 from framework.shared_utils import tokenize
 
 
 class AgendaActions(BaseActions):
+    # Datas gravadas em AAAA-MM-DD: list_by_date / list_between (e o lembrete
+    # do cron) são faixas no índice, já em ordem de data e hora
+    INDEXES    = {"idx_agenda_date": "date, time"}
+    MIGRATIONS = [(1, br_dates_to_iso("agenda"))]
+
+    # Abaixo disso o parser local não é confiável e o LLM é chamado
+    LOCAL_CONFIDENCE = 0.7
+
+    # Saída estruturada pedida ao LLM quando o parser local não resolve
+    LLM_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "evento": {"type": "string", "minLength": 1, "maxLength": 60},
+            "data":   {"type": "string", "pattern": r"^(\d{2}/\d{2}/\d{4}|HOJE)$"},
+            "hora":   {"type": "string", "pattern": r"^([01]\d|2[0-3]):[0-5]\d$|^SEM HORA$"},
+        },
+        "required": ["evento", "data", "hora"],
+    }
+
     def __init__(self, db_path: str):
         schema = (
             "id INTEGER PRIMARY KEY AUTOINCREMENT, "
@@ -14,37 +33,47 @@ class AgendaActions(BaseActions):
         )
         super().__init__(db_path, "agenda", schema)
 
-    def extract_and_prepare(self, message: str, llm_func) -> dict:
+    def extract_and_prepare(self, message: str, llm_json) -> dict:
+        # 1. Parser determinístico (milissegundos) — cobre os casos comuns
+        parsed = parse_agenda(message)
+        date   = to_iso(parsed["date"]) if parsed["date"] else datetime.now().strftime("%Y-%m-%d")
+        if parsed["confidence"] >= self.LOCAL_CONFIDENCE and date:
+            print(f"⚡ AgendaActions: extração local (conf={parsed['confidence']:.2f}) — LLM dispensado")
+            now = datetime.now()
+            return {
+                "date":     date,
+                "time":     parsed["time"] or now.strftime("%H:%M"),
+                "title":    parsed["title"],
+                "keywords": ",".join(tokenize(parsed["title"])),
+                "content":  message,
+            }
+
+        # 2. Fallback: LLM com saída JSON validada contra LLM_SCHEMA
         try:
             prompt = (
                 f"Extraia os dados do compromisso da mensagem abaixo.\n"
-                f"Responda SOMENTE neste formato (sem explicações):\n"
-                f"EVENTO: (nome do compromisso)\n"
-                f"DATA: (DD/MM/AAAA ou 'HOJE')\n"
-                f"HORA: (HH:MM ou 'SEM HORA')\n\n"
+                f"evento: nome do compromisso\n"
+                f"data: DD/MM/AAAA ou 'HOJE'\n"
+                f"hora: HH:MM ou 'SEM HORA'\n\n"
                 f"Mensagem: '{message}'"
             )
-            res = llm_func(prompt, fast=True)
-
-            e_match = re.search(r"EVENTO:\s*(.*)", res)
-            d_match = re.search(r"DATA:\s*([\d/]+|HOJE)", res, re.IGNORECASE)
-            h_match = re.search(r"HORA:\s*([\d:]+|SEM HORA)", res, re.IGNORECASE)
+            res = llm_json(prompt, self.LLM_SCHEMA, fast=True)
 
-            raw_date   = d_match.group(1) if d_match else "HOJE"
+            raw_date   = res.get("data", "HOJE")
             final_date = (
-                datetime.now().strftime("%d/%m/%Y")
+                datetime.now().strftime("%Y-%m-%d")
                 if "HOJE" in raw_date.upper()
-                else raw_date
+                else to_iso(raw_date) or datetime.now().strftime("%Y-%m-%d")
             )
 
-            raw_time   = h_match.group(1) if h_match else "SEM HORA"
+            raw_time   = res.get("hora", "SEM HORA")
             final_time = (
                 datetime.now().strftime("%H:%M")
                 if "SEM" in raw_time.upper()
                 else raw_time
             )
 
-            title = e_match.group(1).strip() if e_match else message[:40]
+            title = res.get("evento") or message[:40]
 
             return {
                 "date":     final_date,
@@ -56,22 +85,27 @@ class AgendaActions(BaseActions):
         except Exception as e:
             print(f"❌ AgendaActions.extract_and_prepare: {e}")
             return {
-                "date":    datetime.now().strftime("%d/%m/%Y"),
+                "date":    datetime.now().strftime("%Y-%m-%d"),
                 "time":    datetime.now().strftime("%H:%M"),
                 "title":   message[:40],
                 "keywords": "",
                 "content": message,
             }
 
-    def list_by_date(self, date: str) -> list[dict]:
-        """Retorna todos os compromissos de uma data específica (DD/MM/AAAA), ordenados por hora."""
+    def list_between(self, date_from: str, date_to: str, limit: int = -1) -> list[dict]:
+        """Compromissos entre duas datas AAAA-MM-DD (inclusivas), por data e hora (-1 = sem limite)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                rows = conn.execute(
-                    "SELECT * FROM agenda WHERE date = ? ORDER BY time ASC", (date,)
+            with db.connect(self.db_path) as conn:
+                rows = db.dict_cursor(conn).execute(
+                    "SELECT * FROM agenda WHERE date BETWEEN ? AND ? "
+                    "ORDER BY date ASC, time ASC LIMIT ?",
+                    (date_from, date_to, limit),
                 ).fetchall()
             return [dict(r) for r in rows]
         except Exception as e:
-            print(f"❌ AgendaActions.list_by_date: {e}")
-            return []
\ No newline at end of file
+            print(f"❌ AgendaActions.list_between: {e}")
+            return []
+
+    def list_by_date(self, date: str) -> list[dict]:
+        """Retorna todos os compromissos de uma data específica (AAAA-MM-DD), ordenados por hora."""
+        return self.list_between(date, date)
@@ -18,16 +18,19 @@ class AgendaCron(BaseCron):
             return
 
         actions = AgendaActions(self.mem.db_path)
-        items   = actions.list_all(limit=20)
+        now     = datetime.now()
+        # Só a janela do alerta (hoje até daqui a 2h), direto pelo índice de data
+        items   = actions.list_between(
+            now.strftime("%Y-%m-%d"), (now + timedelta(hours=2)).strftime("%Y-%m-%d")
+        )
 
-        now      = datetime.now()
-        alertas  = []
+        alertas = []
 
         for item in items:
             try:
                 # Tenta parsear data/hora do compromisso
                 dt_str = f"{item.get('date', '')} {item.get('time', '00:00')}"
-                dt     = datetime.strptime(dt_str, "%d/%m/%Y %H:%M")
+                dt     = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
                 delta  = (dt - now).total_seconds() / 60  # em minutos
 
                 # Alerta se estiver entre 5 e 120 minutos
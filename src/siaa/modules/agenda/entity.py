@@ -1,45 +1,18 @@
-import re
 from datetime import datetime, timedelta
 
 from framework.base_entity import BaseEntity
+from framework.br_parser import parse_date, to_br, to_iso
 from modules.agenda.actions import AgendaActions
 
 
 def _extract_date_from_message(message: str) -> str | None:
     """
-    Tenta extrair uma data da mensagem.
-    Suporta: 'hoje', 'amanhã', 'ontem', 'DD/MM', 'DD/MM/AAAA', 'dia DD'
+    Tenta extrair uma data da mensagem (parser compartilhado: framework/br_parser).
+    Suporta: 'hoje', 'amanhã', 'ontem', dias da semana, 'semana que vem',
+    'DD/MM', 'DD/MM/AAAA', 'dia DD'
     Retorna string no formato DD/MM/AAAA ou None.
     """
-    msg = message.lower()
-    now = datetime.now()
-
-    if "hoje" in msg:
-        return now.strftime("%d/%m/%Y")
-
-    if "amanhã" in msg or "amanha" in msg:
-        return (now + timedelta(days=1)).strftime("%d/%m/%Y")
-
-    if "ontem" in msg:
-        return (now - timedelta(days=1)).strftime("%d/%m/%Y")
-
-    # DD/MM/AAAA
-    m = re.search(r"\b(\d{2}/\d{2}/\d{4})\b", message)
-    if m:
-        return m.group(1)
-
-    # DD/MM (assume ano atual)
-    m = re.search(r"\b(\d{2}/\d{2})\b", message)
-    if m:
-        return f"{m.group(1)}/{now.year}"
-
-    # "dia DD" (assume mês/ano atual)
-    m = re.search(r"\bdia\s+(\d{1,2})\b", msg)
-    if m:
-        day = m.group(1).zfill(2)
-        return f"{day}/{now.strftime('%m/%Y')}"
-
-    return None
+    return parse_date(message, prefer="future")
 
 
 class AgendaEntity(BaseEntity):
@@ -74,10 +47,10 @@ class AgendaEntity(BaseEntity):
 
             # 3. ADICIONAR
             if intent == "AGENDA_ADD":
-                data = self.actions.extract_and_prepare(message, self.mem._llm)
+                data = self.actions.extract_and_prepare(message, self.mem._llm_json)
                 if self.actions.insert(data):
                     hora_str = f" às {data['time']}" if data.get("time") else ""
-                    return f"✅ Agendado: *{data['title']}* para {data['date']}{hora_str}", True
+                    return f"✅ Agendado: *{data['title']}* para {to_br(data['date'])}{hora_str}", True
                 return "❌ Falha ao salvar compromisso.", True
 
             # 4. REMOVER
@@ -88,7 +61,7 @@ class AgendaEntity(BaseEntity):
                     if not proximos:
                         return "📭 Agenda vazia.", True
                     lista = "\n".join(
-                        [f"{i+1}. {r['title']} ({r['date']})" for i, r in enumerate(proximos)]
+                        [f"{i+1}. {r['title']} ({to_br(r['date'])})" for i, r in enumerate(proximos)]
                     )
                     self.mem.pending_action = {
                         "domain": "AGENDA", "type": "SELECTION", "items": proximos
@@ -100,12 +73,12 @@ class AgendaEntity(BaseEntity):
                         "domain": "AGENDA", "type": "DELETE_CONFIRM", "ids": [results[0]["id"]]
                     }
                     return (
-                        f"❓ Encontrei: *{results[0]['title']}* ({results[0]['date']}).\n"
+                        f"❓ Encontrei: *{results[0]['title']}* ({to_br(results[0]['date'])}).\n"
                         f"Confirmar remoção? (Sim/Não)"
                     ), False
 
                 lista = "\n".join(
-                    [f"{i+1}. {r['title']} ({r['date']})" for i, r in enumerate(results[:5])]
+                    [f"{i+1}. {r['title']} ({to_br(r['date'])})" for i, r in enumerate(results[:5])]
                 )
                 self.mem.pending_action = {
                     "domain": "AGENDA", "type": "SELECTION", "items": results[:5]
@@ -117,13 +90,14 @@ class AgendaEntity(BaseEntity):
                 target_date = _extract_date_from_message(message)
 
                 # --- Consulta por data específica ---
-                if target_date:
-                    items = self.actions.list_by_date(target_date)
+                day = to_iso(target_date) if target_date else None
+                if day:
+                    items = self.actions.list_by_date(day)
 
                     now = datetime.now()
                     if target_date == now.strftime("%d/%m/%Y"):
                         label = "Hoje"
-                    elif target_date == (now + __import__("datetime").timedelta(days=1)).strftime("%d/%m/%Y"):
+                    elif target_date == (now + timedelta(days=1)).strftime("%d/%m/%Y"):
                         label = "Amanhã"
                     else:
                         label = target_date
@@ -141,7 +115,7 @@ class AgendaEntity(BaseEntity):
                 if not items:
                     return "📭 Agenda vazia.", True
                 lista = "\n".join(
-                    [f"• {r['date']} {r['time']} — {r['title']}" for r in reversed(items)]
+                    [f"• {to_br(r['date'])} {r['time']} — {r['title']}" for r in reversed(items)]
                 )
                 return f"📅 *Seus compromissos:*\n{lista}", True
 
@@ -1,102 +1,349 @@
 import os
+import re
 import sqlite3
 from datetime import datetime
 
+from framework import db
 from framework.base_actions import BaseActions
+from framework.near_duplicates import DEFAULT_THRESHOLD, dedupe, signature, similarity
+from framework.prompt_builder import PromptBuilder
+from framework.shared_utils import tokenize
+
+
+# Palavras da própria pergunta ("você lembra o que eu falei sobre...")
+# que não dizem nada sobre o assunto buscado
+_SEARCH_STOPWORDS = {
+    "você", "voce", "vc", "lembra", "lembrar", "lembro", "falei", "falou",
+    "falamos", "disse", "conversamos", "sobre", "quando", "qual",
+    "quais", "onde", "como", "algo", "alguma", "coisa", "aquele", "aquela",
+    "isso", "esse", "essa", "este", "esta", "nesse", "nessa", "neste", "nesta",
+    "fiz", "fizemos", "aconteceu",
+    # Período: vira filtro de data (parse_date_range), não termo de busca
+    "ontem", "anteontem", "semana", "passada", "passado", "mês", "mes",
+    "ano", "fim", "final", "último", "última", "últimos", "últimas",
+    "ultimo", "ultima", "ultimos", "ultimas", "dia", "dias", "semanas",
+    "meses", "janeiro", "fevereiro", "março", "marco", "abril", "maio",
+    "junho", "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+}
+
+
+def _stem(term: str) -> str:
+    """Radical grosseiro para o prefixo do FTS: 'médicos' → 'médic', 'café' → 'café'."""
+    if len(term) > 4 and term.endswith("s"):
+        term = term[:-1]
+    if len(term) > 5 and term[-1] in "aeo":
+        term = term[:-1]
+    return term
 
 
 class ChatActions(BaseActions):
+    # Consultas por período ("semana passada") leem só a janela pedida
+    INDEXES = {"idx_long_term_date": "date, time"}
+
+    # db_path → FTS5 disponível (decidido uma vez por processo em _setup)
+    _fts_ready = {}
+
     def __init__(self, db_path: str):
         schema = (
             "id INTEGER PRIMARY KEY AUTOINCREMENT, "
             "date TEXT, time TEXT, intent TEXT, content TEXT"
         )
         super().__init__(db_path, "long_term", schema)
+        self.fts = self._fts_ready.get(db_path, False)
+
+    def _setup(self):
+        ChatActions._fts_ready[self.db_path] = self._ensure_fts()
+
+    def _ensure_fts(self) -> bool:
+        """
+        Índice FTS5 (external content) sobre long_term.content, mantido em
+        sincronia por triggers. Na primeira criação, indexa o histórico que
+        já existe. Sem FTS5 no SQLite, a busca cai no LIKE por termo.
+        """
+        try:
+            with db.connect(self.db_path) as conn:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'long_term_fts'"
+                ).fetchone()
+                conn.executescript("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS long_term_fts USING fts5(
+                        content, content='long_term', content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS long_term_ai AFTER INSERT ON long_term BEGIN
+                        INSERT INTO long_term_fts(rowid, content) VALUES (new.id, new.content);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS long_term_ad AFTER DELETE ON long_term BEGIN
+                        INSERT INTO long_term_fts(long_term_fts, rowid, content)
+                        VALUES ('delete', old.id, old.content);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS long_term_au AFTER UPDATE ON long_term BEGIN
+                        INSERT INTO long_term_fts(long_term_fts, rowid, content)
+                        VALUES ('delete', old.id, old.content);
+                        INSERT INTO long_term_fts(rowid, content) VALUES (new.id, new.content);
+                    END;
+                """)
+                if not exists:
+                    conn.execute("INSERT INTO long_term_fts(long_term_fts) VALUES ('rebuild')")
+                    print("🔎 ChatActions: índice FTS5 do long_term criado.")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ ChatActions: FTS5 indisponível ({e}) — busca via LIKE.")
+            return False
 
     # ------------------------------------------------------------------
     # Salva interação e atualiza actual_context.txt
     # ------------------------------------------------------------------
 
-    def save_interaction(
-        self, intent: str, msg: str, reply: str,
-        llm_func, config: dict, contexts_dir: str
-    ):
-        # 1. Log bruto no SQL
-        self.insert({
-            "date":    datetime.now().strftime("%Y-%m-%d"),
-            "time":    datetime.now().strftime("%H:%M"),
-            "intent":  intent,
-            "content": f"U: {msg} | B: {reply}",
-        })
-
-        # 2. Filtra respostas sem relevância
-        if any(w in reply.lower() for w in ["cancelado", "não encontrei", "erro", "repetir"]):
-            return
+    def log_interaction(self, intent: str, msg: str, reply: str, when: datetime = None):
+        """
+        1. Log bruto no SQL. Falha levanta exceção (não some como no insert());
+        dentro de um db.transaction do chamador, entra na mesma transação.
+        """
+        when = when or datetime.now()
+        with db.transaction(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO long_term (date, time, intent, content) VALUES (?, ?, ?, ?)",
+                (when.strftime("%Y-%m-%d"), when.strftime("%H:%M"), intent, f"U: {msg} | B: {reply}"),
+            )
 
-        path  = os.path.join(contexts_dir, "actual_context.txt")
-        limit = config["memory_limits"]["actual_context_chars"]
+    @staticmethod
+    def is_relevant(reply: str) -> bool:
+        """2. Filtra respostas sem relevância."""
+        return not any(
+            w in reply.lower() for w in ["cancelado", "não encontrei", "erro", "repetir"]
+        )
 
-        current = ""
+    def extract_facts(self, interactions: list[tuple], llm_func) -> list[str]:
+        """
+        3. Extrai o fato principal de cada interação via LLM.
+        interactions: [(msg, reply, datetime), ...] — várias viram UM prompt.
+        """
+        if not interactions:
+            return []
+
+        if len(interactions) == 1:
+            msg, reply, when = interactions[0]
+            day         = when.strftime("%d/%m")
+            fact_prompt = (
+                f"Resuma o fato mais importante (clima, compromissos, preferências) "
+                f"desta conversa em 1 frase curta começando com [{day}]: "
+                f"U:{msg} B:{reply}"
+            )
+            fact = llm_func(fact_prompt, fast=True, profile="fact").strip()
+            return [fact] if fact else []
+
+        numbered = "\n".join(
+            f"{i}. [{when.strftime('%d/%m')}] U:{msg} B:{reply}"
+            for i, (msg, reply, when) in enumerate(interactions, start=1)
+        )
+        pb = PromptBuilder()
+        pb.add(
+            f"Para cada conversa numerada abaixo, resuma o fato mais importante "
+            f"(clima, compromissos, preferências) em 1 frase curta começando com "
+            f"a data entre colchetes. Responda uma linha por conversa no formato "
+            f"'N. [DD/MM] fato'. Se não houver fato relevante, responda 'N. -'.\n\n"
+        )
+        pb.add(numbered, trim="lines", keep="head")
+        res = llm_func(pb.build(), fast=True, profile="fact")
+
+        facts = []
+        for line in res.splitlines():
+            m = re.match(r"\s*(\d+)[.)]\s*(.+)", line)
+            if not m or not 1 <= int(m.group(1)) <= len(interactions):
+                continue
+            fact = m.group(2).strip()
+            if fact and fact != "-":
+                facts.append(fact)
+        return facts
+
+    def apply_facts(self, facts: list[str], llm_func, config: dict, contexts_dir: str):
+        """
+        4. Acrescenta os fatos ao actual_context.txt (append-only, uma linha
+        por fato com a data na frente). Repetições de fatos já presentes
+        são descartadas. O arquivo só é reescrito quando passa do limite de
+        compactação — ver compact_actual().
+        """
+        if not facts:
+            return
+
+        path    = os.path.join(contexts_dir, "actual_context.txt")
+        current = []
         if os.path.exists(path):
             with open(path, "r", encoding="utf-8") as f:
-                current = f.read().strip()
+                current = [l for l in f.read().splitlines() if l.strip()]
 
-        # 3. Extrai fato principal via LLM
-        day         = datetime.now().strftime("%d/%m")
-        fact_prompt = (
-            f"Resuma o fato mais importante (clima, compromissos, preferências) "
-            f"desta conversa em 1 frase curta começando com [{day}]: "
-            f"U:{msg} B:{reply}"
-        )
-        new_fact = llm_func(fact_prompt, fast=True).strip()
+        today = datetime.now().strftime("%d/%m")
+        sigs  = [signature(l) for l in current]
+        new   = []
+        for fact in facts:
+            fact = " ".join(fact.split())
+            if not fact.startswith("["):
+                fact = f"[{today}] {fact}"
+            sig = signature(fact)
+            if sig is None or any(similarity(sig, s) >= DEFAULT_THRESHOLD for s in sigs):
+                continue
+            new.append(fact)
+            sigs.append(sig)
+
+        if new:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(new) + "\n")
+
+        limits = config["memory_limits"]
+        limit  = limits["actual_context_chars"]
+        if os.path.getsize(path) > limits.get("actual_context_compact_chars", limit * 3 // 2):
+            self.compact_actual(llm_func, limit, path)
 
-        # 4. Acumula e compacta se necessário
-        updated = f"{current}\n{new_fact}".strip()
+    @staticmethod
+    def compact_actual(llm_func, limit: int, path: str):
+        """
+        Compactação do actual_context.txt: primeiro tira as quase-duplicatas
+        (MinHash, fica a mais nova); só se ainda passar de 'limit' chama o
+        LLM. Gravação atômica (temporário + os.replace).
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [l for l in f.read().splitlines() if l.strip()]
+
+        updated = "\n".join(dedupe(lines))
         if len(updated) > limit:
-            compact_prompt = (
-                f"Condense estas memórias mantendo datas e fatos essenciais "
-                f"para caber em {limit} caracteres:\n{updated}"
+            # Se nem o prompt couber, os fatos mais antigos saem primeiro
+            pb = PromptBuilder()
+            pb.add(
+                f"Condense estas memórias mantendo datas e fatos essenciais, "
+                f"um fato por linha começando com [DD/MM], para caber em "
+                f"{limit} caracteres:\n"
             )
-            updated = llm_func(compact_prompt, fast=True)[:limit]
+            pb.add(updated, trim="lines", keep="tail")
+            updated = llm_func(pb.build(), fast=True, profile="compaction").strip()
+            if len(updated) > limit:
+                # Corta em linha inteira, sem deixar meio fato no arquivo
+                cut     = updated.rfind("\n", 0, limit)
+                updated = updated[:cut] if cut > 0 else updated[:limit]
 
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(updated)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(updated.strip() + "\n")
+        os.replace(tmp, path)
+        print(
+            f"🗜️  ChatActions: actual_context compactado "
+            f"({len(lines)} → {len(updated.splitlines())} linhas)."
+        )
 
     # ------------------------------------------------------------------
     # Consolida broader_context.txt a partir do histórico SQL
     # ------------------------------------------------------------------
 
-    def update_broader(self, llm_func, config: dict, contexts_dir: str):
+    def update_broader(
+        self, llm_func, config: dict, contexts_dir: str, since_id: int = 0,
+        batch: int = 50,
+    ) -> int:
+        """
+        Consolida no broader_context.txt só as interações com id > since_id,
+        mesclando com o resumo que já existe. Retorna o novo watermark
+        (maior id processado) — igual a since_id se não havia nada novo.
+        llm_func deve levantar exceção em falha (MemoryManager._llm_background):
+        o arquivo só é reescrito com uma resposta de verdade.
+        """
         limit = config["memory_limits"]["broader_context_chars"]
-        items = self.list_all(limit=50)
-        if not items:
-            return
+        try:
+            with db.connect(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT id, content FROM long_term WHERE id > ? ORDER BY id ASC LIMIT ?",
+                    (since_id, batch),
+                ).fetchall()
+        except Exception as e:
+            print(f"❌ ChatActions.update_broader: {e}")
+            return since_id
+        if not rows:
+            return since_id
 
-        raw_text = " ".join([i["content"] for i in items])
-        prompt   = (
-            f"Com base no histórico abaixo, crie uma lista de fatos conhecidos "
-            f"sobre o usuário em tópicos curtos (max {limit} chars):\n{raw_text}"
+        path    = os.path.join(contexts_dir, "broader_context.txt")
+        current = ""
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                current = f.read().strip()
+
+        # Interações novas em ordem cronológica: se não couber, saem as mais antigas
+        pb = PromptBuilder()
+        pb.add(
+            f"Atualize a lista de fatos conhecidos sobre o usuário, em tópicos "
+            f"curtos (max {limit} chars). Mantenha os fatos atuais que continuam "
+            f"válidos e acrescente os das novas interações.\n\n"
         )
-        topics = llm_func(prompt, fast=True)
+        pb.add(current, priority=0, trim="lines", keep="head", prefix="[FATOS ATUAIS]\n")
+        pb.add("\n".join(c for _, c in rows), priority=1, trim="lines", prefix="\n\n[NOVAS INTERAÇÕES]\n")
+        topics = (llm_func(pb.build(), fast=True, profile="compaction") or "").strip()
+        if not topics:
+            return since_id
 
-        with open(
-            os.path.join(contexts_dir, "broader_context.txt"), "w", encoding="utf-8"
-        ) as f:
+        with open(path, "w", encoding="utf-8") as f:
             f.write(topics[:limit])
+        return rows[-1][0]
 
     # ------------------------------------------------------------------
     # Busca no histórico SQL
     # ------------------------------------------------------------------
 
-    def search_memory(self, query: str, limit: int) -> str | None:
+    @staticmethod
+    def search_terms(query: str) -> list[str]:
+        """Termos de busca: tokenize() sem as palavras da própria pergunta."""
+        return sorted(t for t in tokenize(query) if t not in _SEARCH_STOPWORDS)
+
+    @classmethod
+    def fts_query(cls, query: str) -> str | None:
+        """Expressão MATCH do FTS5: termos em OR pelo radical, com prefixo."""
+        return " OR ".join(f'"{_stem(t)}"*' for t in cls.search_terms(query)) or None
+
+    def search_memory(
+        self, query: str, limit: int,
+        date_from: str | None = None, date_to: str | None = None,
+    ) -> str | None:
+        """
+        Busca no histórico. Com FTS5: termos em OR pelo radical ('médicos'
+        vira 'médic*', que acha 'médico' e 'médica'), ordenados por BM25. date_from/date_to
+        (AAAA-MM-DD, inclusivos) restringem o período pelo índice (date, time).
+        Sem termos, mas com período, devolve as interações mais recentes do período.
+        """
+        terms   = self.search_terms(query)
+        filters, params = [], []
+        if date_from and date_to:
+            filters.append("l.date BETWEEN ? AND ?")
+            params += [date_from, date_to]
+        elif date_from:
+            filters.append("l.date >= ?")
+            params.append(date_from)
+        elif date_to:
+            filters.append("l.date <= ?")
+            params.append(date_to)
+        if not terms and not filters:
+            return None
+
+        where = "".join(f" AND {f}" for f in filters)
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                rows = conn.execute(
-                    "SELECT content FROM long_term "
-                    "WHERE content LIKE ? ORDER BY id DESC LIMIT ?",
-                    (f"%{query}%", limit),
-                ).fetchall()
-            return "\n".join([r[0] for r in rows]) if rows else None
+            with db.connect(self.db_path) as conn:
+                if terms and self.fts:
+                    rows = conn.execute(
+                        "SELECT l.date, l.time, l.content FROM long_term_fts f "
+                        "JOIN long_term l ON l.id = f.rowid "
+                        f"WHERE long_term_fts MATCH ?{where} "
+                        "ORDER BY bm25(long_term_fts) LIMIT ?",
+                        (self.fts_query(query), *params, limit),
+                    ).fetchall()
+                elif terms:
+                    likes = " OR ".join("l.content LIKE ?" for _ in terms)
+                    rows  = conn.execute(
+                        f"SELECT l.date, l.time, l.content FROM long_term l "
+                        f"WHERE ({likes}){where} ORDER BY l.id DESC LIMIT ?",
+                        (*[f"%{t}%" for t in terms], *params, limit),
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        f"SELECT l.date, l.time, l.content FROM long_term l "
+                        f"WHERE 1 = 1{where} ORDER BY l.date DESC, l.time DESC LIMIT ?",
+                        (*params, limit),
+                    ).fetchall()
+            return "\n".join(f"[{d} {t}] {c}" for d, t, c in rows) if rows else None
         except Exception as e:
             print(f"❌ ChatActions.search_memory: {e}")
             return None
@@ -1,20 +1,78 @@
 from framework.base_entity import BaseEntity
 
 
+# Teto do histórico no prompt reconstruído (turnos inteiros, mais recentes)
+HISTORY_MAX_TOKENS = 150
+
+# Ordem em que as partes recebem orçamento (0 = primeiro a ser atendido)
+_LAYER_PRIORITY = {"important": 0, "actual": 2, "broader": 3}
+_HISTORY_PRIORITY = 1
+
+
 class ChatEntity(BaseEntity):
+    def __init__(self, memory):
+        super().__init__(memory)
+        # Reuso do context do Ollama entre turnos da mesma sessão
+        self._kv_context = None
+        self._kv_history = None  # history esperado no próximo turno
+
+    def _reset_kv(self):
+        self._kv_context = None
+        self._kv_history = None
+
+    def _can_reuse_kv(self, history: str, prompt: str) -> bool:
+        """
+        Só reaproveita o context se o history recebido for exatamente o
+        que o app.py montou a partir do nosso último turno. Qualquer
+        divergência (sessão resetada, turno de outro módulo no meio)
+        força a reconstrução do prompt completo.
+
+        E só se context + prompt novo + resposta (num_predict do perfil
+        'chat') couberem no num_ctx — senão o Ollama trunca calado.
+        """
+        if self._kv_context is None or history != self._kv_history:
+            return False
+        budget = self.mem.prompt_builder("chat", situational=False).budget
+        return len(self._kv_context) + self.mem.tokens.count(prompt) <= budget
+
+    def _build_prompt(self, message: str, history: str) -> str:
+        """Prompt completo dentro do orçamento de tokens do perfil 'chat'."""
+        pb = self.mem.prompt_builder("chat")
+        pb.add(
+            f"Abaixo está o histórico de uma conversa. "
+            f"Responda APENAS com a sua próxima fala.\n"
+            f"Não use prefixos como '{self.mem.bot_name}:' ou '{self.mem.user_name}:'.\n\n"
+            f"[CONTEXTO SOBRE VOCÊ]\n"
+        )
+        # Bloco já renderizado e contado no cache do MemoryManager: entra
+        # inteiro quando cabe; só é cortado por linhas se estourar o orçamento
+        for key, content, block, tokens in self.mem.context_layers():
+            pb.add(
+                content, priority=_LAYER_PRIORITY.get(key, 3), trim="lines",
+                prefix=f"\n[{key.upper()}_MEMORY]\n", rendered=block, tokens=tokens,
+            )
+        pb.add(
+            history, priority=_HISTORY_PRIORITY, trim="turns",
+            max_tokens=HISTORY_MAX_TOKENS, prefix="\n\n[HISTÓRICO]\n",
+            turn_start=f"{self.user}:",
+        )
+        pb.add(
+            f"\n\nMensagem atual do usuário: {message}\n"
+            f"Sua resposta direta:"
+        )
+        return pb.build()
+
     def run(self, message: str, intent: str, history: str = "") -> tuple:
         try:
-            contexto = self.mem.get_context()
+            # Só os tokens novos — memória e histórico já estão no context
             prompt = (
-                f"Abaixo está o histórico de uma conversa. "
-                f"Responda APENAS com a sua próxima fala.\n"
-                f"Não use prefixos como '{self.mem.bot_name}:' ou '{self.mem.user_name}:'.\n\n"
-                f"[CONTEXTO SOBRE VOCÊ]\n{contexto}\n\n"
-                f"[HISTÓRICO]\n{history[-300:]}\n\n"
-                f"Mensagem atual do usuário: {message}\n"
+                f"\n\nMensagem atual do usuário: {message}\n"
                 f"Sua resposta direta:"
             )
-            reply = self.mem._llm(prompt)
+            if self._can_reuse_kv(history, prompt):
+                reply, context = self.mem._llm_with_context(prompt, self._kv_context)
+            else:
+                reply, context = self.mem._llm_with_context(self._build_prompt(message, history))
 
             # Remove prefixos que o modelo pode gerar mesmo com instrução
             for prefix in [
@@ -24,9 +82,19 @@ class ChatEntity(BaseEntity):
                 if reply.startswith(prefix):
                     reply = reply[len(prefix):].strip()
 
-            return reply.strip() or "Pode repetir?", False
+            reply = reply.strip() or "Pode repetir?"
+
+            # Mesmo formato que o app.py usa para acumular o history
+            if context:
+                self._kv_context = context
+                self._kv_history = f"{history}\n{self.user}: {message}\n{self.name}: {reply}"
+            else:
+                self._reset_kv()
+
+            return reply, False
 
         except Exception as e:
             print(f"❌ ChatEntity: {e}")
+            self._reset_kv()
             self.mem.pending_action = None
             return "Tive um problema ao pensar na resposta. Pode falar de novo?", True
@@ -1,12 +1,34 @@
-import re
-import sqlite3
 from datetime import datetime, timedelta
 
-from framework.base_actions import BaseActions
+from framework import db
+from framework.base_actions import BaseActions, br_dates_to_iso
+from framework.br_parser import parse_finance, to_iso
 from framework.shared_utils import tokenize
 
 
 class FinanceActions(BaseActions):
+    # Datas gravadas em AAAA-MM-DD: faixas (semana, mês) viram BETWEEN no índice.
+    # list_by_date sai já em ordem de hora; as somas leem só o índice (date, amount).
+    INDEXES = {
+        "idx_finance_date":        "date, time",
+        "idx_finance_date_amount": "date, amount",
+    }
+    MIGRATIONS = [(1, br_dates_to_iso("finance"))]
+
+    # Abaixo disso o parser local não é confiável e o LLM é chamado
+    LOCAL_CONFIDENCE = 0.7
+
+    # Saída estruturada pedida ao LLM quando o parser local não resolve
+    LLM_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "valor":  {"type": "number", "minimum": 0.01},
+            "titulo": {"type": "string", "minLength": 1, "maxLength": 40},
+            "data":   {"type": "string", "pattern": r"^(\d{2}/\d{2}/\d{4}|HOJE)$"},
+        },
+        "required": ["valor", "titulo", "data"],
+    }
+
     def __init__(self, db_path: str):
         schema = (
             "id INTEGER PRIMARY KEY AUTOINCREMENT, "
@@ -15,37 +37,44 @@ class FinanceActions(BaseActions):
         )
         super().__init__(db_path, "finance", schema)
 
-    def extract_and_prepare(self, message: str, llm_func) -> dict:
+    def extract_and_prepare(self, message: str, llm_json) -> dict:
+        # 1. Parser determinístico (microssegundos) — cobre os casos comuns
+        parsed = parse_finance(message)
+        date   = to_iso(parsed["date"])
+        if parsed["confidence"] >= self.LOCAL_CONFIDENCE and date:
+            print(f"⚡ FinanceActions: extração local (conf={parsed['confidence']:.2f}) — LLM dispensado")
+            return {
+                "date":     date,
+                "time":     datetime.now().strftime("%H:%M"),
+                "amount":   parsed["amount"],
+                "desc":     parsed["desc"],
+                "keywords": ",".join(tokenize(parsed["desc"])),
+                "content":  message,
+            }
+
+        # 2. Fallback: LLM com saída JSON validada contra LLM_SCHEMA
         try:
             prompt = (
                 f"Analise a mensagem e extraia os dados financeiros.\n"
-                f"Responda SOMENTE neste formato (sem explicações):\n"
-                f"VALOR: (apenas número, ponto para decimal)\n"
-                f"TITULO: (máximo 4 palavras)\n"
-                f"DATA: (DD/MM/AAAA ou 'HOJE')\n\n"
+                f"valor: apenas número, ponto para decimal\n"
+                f"titulo: máximo 4 palavras\n"
+                f"data: DD/MM/AAAA ou 'HOJE'\n\n"
                 f"Mensagem: '{message}'"
             )
-            res = llm_func(prompt, fast=True)
-
-            v_match = re.search(r"VALOR:\s*([\d.,]+)", res)
-            t_match = re.search(r"TITULO:\s*(.*)", res)
-            d_match = re.search(r"DATA:\s*([\d/]+|HOJE)", res, re.IGNORECASE)
+            res = llm_json(prompt, self.LLM_SCHEMA, fast=True)
 
-            amount_str = v_match.group(1).replace(",", ".") if v_match else "0"
-            amount     = float(re.sub(r"[^\d.]", "", amount_str))
-
-            raw_date   = d_match.group(1) if d_match else "HOJE"
+            raw_date   = res.get("data", "HOJE")
             final_date = (
-                datetime.now().strftime("%d/%m/%Y")
+                datetime.now().strftime("%Y-%m-%d")
                 if "HOJE" in raw_date.upper()
-                else raw_date
+                else to_iso(raw_date) or datetime.now().strftime("%Y-%m-%d")
             )
-            desc = t_match.group(1).strip() if t_match else message[:30]
+            desc = res.get("titulo") or message[:30]
 
             return {
                 "date":     final_date,
                 "time":     datetime.now().strftime("%H:%M"),
-                "amount":   amount,
+                "amount":   res.get("valor", 0),
                 "desc":     desc,
                 "keywords": ",".join(tokenize(desc)),
                 "content":  message,
@@ -53,7 +82,7 @@ class FinanceActions(BaseActions):
         except Exception as e:
             print(f"❌ FinanceActions.extract_and_prepare: {e}")
             return {
-                "date": datetime.now().strftime("%d/%m/%Y"),
+                "date": datetime.now().strftime("%Y-%m-%d"),
                 "time": datetime.now().strftime("%H:%M"),
                 "amount": 0,
                 "desc": message[:30],
@@ -62,50 +91,47 @@ class FinanceActions(BaseActions):
             }
 
     def get_total(self, period: str = "month") -> float:
-        """Soma todos os gastos do período (today / week / month)."""
-        now = datetime.now()
-        if period == "today":
-            cutoff = now.strftime("%d/%m/%Y")
-            query  = "SELECT SUM(amount) FROM finance WHERE date = ?"
-            params = (cutoff,)
-        elif period == "week":
-            cutoff = (now - timedelta(days=7)).strftime("%d/%m/%Y")
-            query  = "SELECT SUM(amount) FROM finance WHERE date >= ?"
-            params = (cutoff,)
-        else:  # month — filtra por mês/ano
-            month_str = now.strftime("%m/%Y")
-            query  = "SELECT SUM(amount) FROM finance WHERE date LIKE ?"
-            params = (f"%/{month_str}",)
+        """Soma todos os gastos do período (today / week = últimos 7 dias / month)."""
+        today = datetime.now().date()
+        start = end = today
+        if period == "week":
+            start = today - timedelta(days=6)
+        elif period != "today":  # month — o mês inteiro
+            start = today.replace(day=1)
+            end   = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return self.get_total_between(start.isoformat(), end.isoformat())
 
+    def get_total_between(self, date_from: str, date_to: str) -> float:
+        """Soma dos gastos entre duas datas AAAA-MM-DD (inclusivas)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                result = conn.execute(query, params).fetchone()
-            return result[0] or 0.0
-        except Exception as e:
-            print(f"❌ FinanceActions.get_total: {e}")
-            return 0.0
-
-    def get_total_by_date(self, date: str) -> float:
-        """Soma os gastos de uma data específica no formato DD/MM/AAAA."""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
+            with db.connect(self.db_path) as conn:
                 result = conn.execute(
-                    "SELECT SUM(amount) FROM finance WHERE date = ?", (date,)
+                    "SELECT SUM(amount) FROM finance WHERE date BETWEEN ? AND ?",
+                    (date_from, date_to),
                 ).fetchone()
             return result[0] or 0.0
         except Exception as e:
-            print(f"❌ FinanceActions.get_total_by_date: {e}")
+            print(f"❌ FinanceActions.get_total_between: {e}")
             return 0.0
 
-    def list_by_date(self, date: str) -> list[dict]:
-        """Retorna todos os lançamentos de uma data específica (DD/MM/AAAA)."""
+    def get_total_by_date(self, date: str) -> float:
+        """Soma os gastos de uma data específica (AAAA-MM-DD)."""
+        return self.get_total_between(date, date)
+
+    def list_between(self, date_from: str, date_to: str, limit: int = -1) -> list[dict]:
+        """Lançamentos entre duas datas AAAA-MM-DD (inclusivas), em ordem cronológica (-1 = sem limite)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                rows = conn.execute(
-                    "SELECT * FROM finance WHERE date = ? ORDER BY time ASC", (date,)
+            with db.connect(self.db_path) as conn:
+                rows = db.dict_cursor(conn).execute(
+                    "SELECT * FROM finance WHERE date BETWEEN ? AND ? "
+                    "ORDER BY date ASC, time ASC LIMIT ?",
+                    (date_from, date_to, limit),
                 ).fetchall()
             return [dict(r) for r in rows]
         except Exception as e:
-            print(f"❌ FinanceActions.list_by_date: {e}")
-            return []
\ No newline at end of file
+            print(f"❌ FinanceActions.list_between: {e}")
+            return []
+
+    def list_by_date(self, date: str) -> list[dict]:
+        """Retorna todos os lançamentos de uma data específica (AAAA-MM-DD)."""
+        return self.list_between(date, date)
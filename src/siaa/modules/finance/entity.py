@@ -1,43 +1,19 @@
-import re
 from datetime import datetime
 
 from framework.base_entity import BaseEntity
+from framework.br_parser import parse_date_range, to_br, to_iso
 from modules.finance.actions import FinanceActions
 
 
-def _extract_date_from_message(message: str) -> str | None:
+def _extract_period_from_message(message: str) -> tuple[str, str] | None:
     """
-    Tenta extrair uma data da mensagem.
-    Suporta: 'hoje', 'ontem', 'DD/MM', 'DD/MM/AAAA', 'dia DD'
-    Retorna string no formato DD/MM/AAAA ou None.
+    Tenta extrair um período da mensagem (parser compartilhado: framework/br_parser).
+    Suporta: 'hoje', 'ontem', dias da semana (a última ocorrência),
+    'DD/MM', 'DD/MM/AAAA', 'dia DD' (início = fim) e faixas como
+    'semana passada', 'esse mês', 'em março', 'últimos 15 dias'.
+    Retorna (início, fim) no formato DD/MM/AAAA ou None.
     """
-    msg = message.lower()
-    now = datetime.now()
-
-    if "hoje" in msg:
-        return now.strftime("%d/%m/%Y")
-
-    if "ontem" in msg:
-        from datetime import timedelta
-        return (now - timedelta(days=1)).strftime("%d/%m/%Y")
-
-    # DD/MM/AAAA
-    m = re.search(r"\b(\d{2}/\d{2}/\d{4})\b", message)
-    if m:
-        return m.group(1)
-
-    # DD/MM (assume ano atual)
-    m = re.search(r"\b(\d{2}/\d{2})\b", message)
-    if m:
-        return f"{m.group(1)}/{now.year}"
-
-    # "dia DD" (assume mês/ano atual)
-    m = re.search(r"\bdia\s+(\d{1,2})\b", msg)
-    if m:
-        day = m.group(1).zfill(2)
-        return f"{day}/{now.strftime('%m/%Y')}"
-
-    return None
+    return parse_date_range(message)
 
 
 class FinanceEntity(BaseEntity):
@@ -72,13 +48,13 @@ class FinanceEntity(BaseEntity):
 
             # 3. ADICIONAR
             if intent == "FINANCE_ADD":
-                data = self.actions.extract_and_prepare(message, self.mem._llm)
+                data = self.actions.extract_and_prepare(message, self.mem._llm_json)
                 if data.get("amount", 0) <= 0:
                     return "❓ Não identifiquei o valor. Pode repetir com o valor?", True
                 if self.actions.insert(data):
                     return (
                         f"💰 Salvo: *{data['desc']}* — R$ {data['amount']:.2f} "
-                        f"em {data['date']}"
+                        f"em {to_br(data['date'])}"
                     ), True
                 return "❌ Erro ao salvar.", True
 
@@ -92,7 +68,7 @@ class FinanceEntity(BaseEntity):
                     if not ultimos:
                         return "📭 Não há lançamentos.", True
                     lista = "\n".join(
-                        [f"{i+1}. {r['desc']} — R$ {r['amount']:.2f} ({r['date']})"
+                        [f"{i+1}. {r['desc']} — R$ {r['amount']:.2f} ({to_br(r['date'])})"
                          for i, r in enumerate(ultimos)]
                     )
                     self.mem.pending_action = {
@@ -111,7 +87,7 @@ class FinanceEntity(BaseEntity):
                     ), False
 
                 lista = "\n".join(
-                    [f"{i+1}. {r['desc']} — R$ {r['amount']:.2f} ({r['date']})"
+                    [f"{i+1}. {r['desc']} — R$ {r['amount']:.2f} ({to_br(r['date'])})"
                      for i, r in enumerate(results[:5])]
                 )
                 self.mem.pending_action = {
@@ -121,12 +97,14 @@ class FinanceEntity(BaseEntity):
 
             # 5. LISTAR
             if intent == "FINANCE_LIST":
-                target_date = _extract_date_from_message(message)
+                period = _extract_period_from_message(message)
+                start, end = (to_iso(d) for d in period) if period else (None, None)
 
                 # --- Consulta por data específica ---
-                if target_date:
-                    items = self.actions.list_by_date(target_date)
-                    total = self.actions.get_total_by_date(target_date)
+                if start and start == end:
+                    target_date = period[0]
+                    items = self.actions.list_by_date(start)
+                    total = self.actions.get_total_by_date(start)
 
                     label = "Hoje" if target_date == datetime.now().strftime("%d/%m/%Y") else target_date
 
@@ -142,6 +120,25 @@ class FinanceEntity(BaseEntity):
                         f"📊 Total do dia: R$ {total:.2f}"
                     ), True
 
+                # --- Consulta por período (semana passada, esse mês...) ---
+                if start and end:
+                    items = self.actions.list_between(start, end)
+                    total = self.actions.get_total_between(start, end)
+                    label = f"{period[0]} a {period[1]}"
+
+                    if not items:
+                        return f"📭 Nenhum gasto registrado de *{label}*.", True
+
+                    lista = "\n".join(
+                        [f"• {to_br(r['date'])[:5]} — {r['desc']}: R$ {r['amount']:.2f}"
+                         for r in items[-15:]]
+                    )
+                    mais = f"\n(+{len(items) - 15} anteriores)" if len(items) > 15 else ""
+                    return (
+                        f"💸 *Gastos de {label}:*\n{lista}{mais}\n\n"
+                        f"📊 Total do período: R$ {total:.2f}"
+                    ), True
+
                 # --- Consulta geral (últimos lançamentos + total do mês) ---
                 total_mes  = self.actions.get_total("month")
                 total_hoje = self.actions.get_total("today")
@@ -151,7 +148,7 @@ class FinanceEntity(BaseEntity):
                     return "📭 Nenhum gasto registrado.", True
 
                 lista = "\n".join(
-                    [f"• {r['date']} — {r['desc']}: R$ {r['amount']:.2f}"
+                    [f"• {to_br(r['date'])} — {r['desc']}: R$ {r['amount']:.2f}"
                      for r in reversed(items)]
                 )
                 total_listado = sum(r["amount"] for r in items)
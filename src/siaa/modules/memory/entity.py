@@ -11,10 +11,11 @@ class MemoryEntity(BaseEntity):
                 True,
             )
 
-        prompt = (
-            f"O usuário quer saber algo do passado. "
-            f"Encontrei estes registros:\n{results}\n\n"
-            f"Responda de forma natural à pergunta: {message}"
-        )
-        reply = self.mem._llm(prompt)
+        # Acertos diretos vêm antes dos resumos do período (search_long_term):
+        # no corte saem primeiro os resumos, depois os acertos mais fracos
+        pb = self.mem.prompt_builder("memory")
+        pb.add("O usuário quer saber algo do passado. ")
+        pb.add(results, priority=0, trim="lines", keep="head", prefix="Encontrei estes registros:\n")
+        pb.add(f"\n\nResponda de forma natural à pergunta: {message}")
+        reply = self.mem._llm(pb.build(), profile="memory")
         return reply, True
@@ -0,0 +1,79 @@
+"""
+tests/bench_br_parser.py
+
+Mede quantas chamadas ao LLM o parser determinístico (framework/br_parser)
+evita no FINANCE_ADD e no AGENDA_ADD, usando os exemplos dos training.json.
+Execute a partir da raiz src/siaa/:
+    python3 tests/bench_br_parser.py
+"""
+
+import json
+import os
+import sys
+import time
+
+# Garante que src/siaa/ está no path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from framework.br_parser import parse_agenda, parse_finance
+
+# Mesmo limiar de FinanceActions/AgendaActions.LOCAL_CONFIDENCE (sem importar sqlite/actions)
+LOCAL_CONFIDENCE = 0.7
+
+
+def load_corpus(module: str, intent: str) -> list[str]:
+    path = os.path.normpath(
+        os.path.join(os.path.dirname(__file__), "..", "modules", module, "training.json")
+    )
+    with open(path, "r", encoding="utf-8") as f:
+        return [s for s in json.load(f).get(intent, []) if s.strip()]
+
+
+def _describe(result: dict) -> str:
+    if "amount" in result:
+        valor = f"R$ {result['amount']:.2f}" if result["amount"] else "—"
+        return f"{valor} | {result['desc']}"
+    return f"{result['date'] or '—'} {result['time'] or '--:--'} | {result['title']}"
+
+
+def run_bench(name: str, parser, corpus: list[str], repeat: int = 500) -> tuple:
+    print(f"\n🚀 --- BENCH {name} ({len(corpus)} frases) --- 🚀")
+    print(f"{'FRASE':<38} | {'EXTRAÍDO':<40} | {'CONF':<4} | ROTA")
+    print("-" * 100)
+
+    local = 0
+    for phrase in corpus:
+        r     = parser(phrase)
+        ok    = r["confidence"] >= LOCAL_CONFIDENCE
+        local += ok
+        rota  = "⚡ local" if ok else "🧠 LLM"
+        print(f"{phrase[:38]:<38} | {_describe(r)[:40]:<40} | {r['confidence']:.2f} | {rota}")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for phrase in corpus:
+            parser(phrase)
+    per_call_us = (time.perf_counter() - start) / (repeat * len(corpus)) * 1e6
+
+    return local, len(corpus), per_call_us
+
+
+def run_all():
+    results = {
+        "FINANCE_ADD": run_bench("FINANCE_ADD", parse_finance, load_corpus("finance", "FINANCE_ADD")),
+        "AGENDA_ADD":  run_bench("AGENDA_ADD", parse_agenda, load_corpus("agenda", "AGENDA_ADD")),
+    }
+
+    print("\n" + "=" * 50)
+    print("📊 RELATÓRIO — CHAMADAS AO LLM")
+    print("=" * 50)
+    for intent, (local, total, us) in results.items():
+        print(
+            f"{intent:<12} -> antes: {total:>3} | agora: {total - local:>3} "
+            f"| redução: {local / total * 100:5.1f}% | {us:.1f} µs/msg"
+        )
+    print("=" * 50 + "\n")
+
+
+if __name__ == "__main__":
+    run_all()
@@ -0,0 +1,139 @@
+"""
+tests/bench_latency.py
+
+Benchmark ponta a ponta, 100% offline: sobe o tests/fake_ollama.py,
+aponta o MemoryManager para ele (SIAA_DATA_DIR temporário) e passa as
+frases dos training.json pelo CynbotAgent.process, como o app.py faz.
+
+Relatório por intenção: p50 / p95 / p99 da latência e média de
+chamadas ao LLM por mensagem.
+
+Execute a partir da raiz src/siaa/:
+    python3 tests/bench_latency.py                 # 5 frases por intenção
+    python3 tests/bench_latency.py --per-intent 20 --token-rate 15
+    python3 tests/bench_latency.py --time-scale 0  # só conta chamadas
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Garante que src/siaa/ está no path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.intent_handler import pre_process  # noqa: F401 — o pickle do SVM procura em __main__
+from tests.fake_ollama import FakeOllamaConfig, start_server
+
+# Módulos que dependem de APIs externas ficam fora por padrão (use --all)
+_ONLINE_PREFIXES = ("WEATHER", "NEWS")
+
+
+def load_corpus(per_intent: int, include_online: bool) -> list[tuple[str, str]]:
+    modules_dir = os.path.join(os.path.dirname(__file__), "..", "modules")
+    corpus      = []
+    for name in sorted(os.listdir(modules_dir)):
+        path = os.path.join(modules_dir, name, "training.json")
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for intent, phrases in data.items():
+            if not include_online and intent.startswith(_ONLINE_PREFIXES):
+                continue
+            corpus += [(intent, p) for p in phrases if p.strip()][:per_intent]
+    return corpus
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k       = (len(ordered) - 1) * pct / 100
+    lo, hi  = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def run_bench(agent, memory, cfg: FakeOllamaConfig, corpus: list[tuple[str, str]]) -> dict:
+    results = {}
+    print(f"\n🚀 --- BENCH LATÊNCIA ({len(corpus)} mensagens) --- 🚀")
+    print(f"{'ESPERADO':<14} | {'CLASSIFICADO':<14} | {'MS':>7} | LLM | FRASE")
+    print("-" * 90)
+
+    for expected, phrase in corpus:
+        memory.pending_action = None  # cada mensagem é independente
+        before = cfg.requests
+        start  = time.perf_counter()
+        intent, _reply, _close = agent.process(phrase, "")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        calls      = cfg.requests - before
+
+        bucket = results.setdefault(expected, {"ms": [], "calls": [], "hits": 0})
+        bucket["ms"].append(elapsed_ms)
+        bucket["calls"].append(calls)
+        bucket["hits"] += intent == expected
+        print(f"{expected:<14} | {intent:<14} | {elapsed_ms:>7.0f} | {calls:>3} | {phrase[:40]}")
+
+    return results
+
+
+def report(results: dict):
+    print(f"\n📊 {'INTENÇÃO':<14} | {'N':>3} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'LLM/msg':>7} | SVM")
+    print("-" * 80)
+    all_ms, all_calls = [], []
+    for intent, r in sorted(results.items()):
+        n = len(r["ms"])
+        all_ms    += r["ms"]
+        all_calls += r["calls"]
+        print(
+            f"   {intent:<14} | {n:>3} | {percentile(r['ms'], 50):>8.0f} | "
+            f"{percentile(r['ms'], 95):>8.0f} | {percentile(r['ms'], 99):>8.0f} | "
+            f"{sum(r['calls']) / n:>7.2f} | {r['hits']}/{n}"
+        )
+    print("-" * 80)
+    print(
+        f"   {'TOTAL':<14} | {len(all_ms):>3} | {percentile(all_ms, 50):>8.0f} | "
+        f"{percentile(all_ms, 95):>8.0f} | {percentile(all_ms, 99):>8.0f} | "
+        f"{sum(all_calls) / max(len(all_calls), 1):>7.2f} |"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline do CynbotAgent")
+    parser.add_argument("--per-intent", type=int, default=5)
+    parser.add_argument("--token-rate", type=float, default=20.0)
+    parser.add_argument("--prompt-rate", type=float, default=300.0)
+    parser.add_argument("--load-time", type=float, default=0.0)
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--all", action="store_true", help="inclui módulos online (clima, notícias)")
+    args = parser.parse_args()
+
+    cfg = FakeOllamaConfig(
+        load_time=args.load_time, prompt_rate=args.prompt_rate,
+        token_rate=args.token_rate, time_scale=args.time_scale,
+    )
+    server = start_server(cfg)
+
+    # Ambiente isolado: banco/contextos temporários, só o fake como backend
+    os.environ["SIAA_DATA_DIR"] = tempfile.mkdtemp(prefix="siaa-bench-")
+    # Config do repositório (o módulo de clima exige 'location')
+    repo_config = os.path.join(
+        os.path.dirname(__file__), "..", "..", "..", "volumes", "config-data", "config.json"
+    )
+    if os.path.exists(repo_config):
+        shutil.copy(repo_config, os.path.join(os.environ["SIAA_DATA_DIR"], "config.json"))
+    os.environ["OLLAMA_URL"]    = f"http://127.0.0.1:{server.server_port}"
+    os.environ.pop("OLLAMA_URLS", None)
+
+    from core.agent import CynbotAgent
+    from core.memory_manager import MemoryManager
+
+    memory = MemoryManager()
+    agent  = CynbotAgent(memory)
+
+    results = run_bench(agent, memory, cfg, load_corpus(args.per_intent, args.all))
+    report(results)
+    server.shutdown()
@@ -0,0 +1,115 @@
+"""
+tests/bench_sqlite.py
+
+Micro-benchmark do acesso ao SQLite: o padrão antigo (um sqlite3.connect
+novo por operação, pragmas padrão) contra o framework/db.py (conexão
+reaproveitada por thread + WAL, synchronous=NORMAL, mmap, cache).
+
+Mede operações/segundo de insert, list_all e search_multiple do
+BaseActions, cada um num banco temporário próprio.
+
+Execute a partir da raiz src/siaa/:
+    python3 tests/bench_sqlite.py
+    python3 tests/bench_sqlite.py --rows 5000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Garante que src/siaa/ está no path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from framework import db
+from framework.base_actions import BaseActions
+
+SCHEMA = "id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, description TEXT, amount REAL"
+
+
+class LegacyActions:
+    """O BaseActions de antes do framework/db.py: conexão nova a cada chamada."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS bench ({SCHEMA})")
+
+    def insert(self, data: dict):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                f"INSERT INTO bench ({', '.join(data)}) VALUES ({', '.join('?' * len(data))})",
+                tuple(data.values()),
+            )
+            conn.commit()
+
+    def list_all(self, limit: int = 10):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM bench ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def search_multiple(self, query: str, fields: list[str]):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM bench ORDER BY id DESC LIMIT 50").fetchall()
+        return [dict(r) for r in rows if query in " ".join(str(r[f]) for f in fields)]
+
+
+def _row(i: int) -> dict:
+    return {"date": f"2026-01-{i % 28 + 1:02d}", "description": f"mercado item {i}", "amount": i * 1.5}
+
+
+def run(actions, rows: int) -> dict:
+    results = {}
+
+    start = time.perf_counter()
+    for i in range(rows):
+        actions.insert(_row(i))
+    results["insert"] = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(rows):
+        actions.list_all(10)
+    results["list_all"] = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(rows // 2):
+        actions.search_multiple("mercado", ["description"])
+    results["search_multiple"] = (rows // 2) / (time.perf_counter() - start)
+    return results
+
+
+def run_transaction(db_path: str, rows: int) -> float:
+    """Inserts agrupados num db.transaction (um commit só)."""
+    start = time.perf_counter()
+    with db.transaction(db_path) as conn:
+        for i in range(rows):
+            data = _row(i)
+            conn.execute(
+                "INSERT INTO bench (date, description, amount) VALUES (?, ?, ?)",
+                tuple(data.values()),
+            )
+    return rows / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do acesso SQLite (antes/depois do framework/db)")
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp    = tempfile.mkdtemp(prefix="siaa-bench-sqlite-")
+    before = run(LegacyActions(os.path.join(tmp, "legacy.db")), args.rows)
+    after  = run(BaseActions(os.path.join(tmp, "pooled.db"), "bench", SCHEMA), args.rows)
+
+    print(f"\n🚀 --- BENCH SQLITE ({args.rows} operações) --- 🚀")
+    print(f"{'OPERAÇÃO':<16} | {'ANTES op/s':>11} | {'DEPOIS op/s':>11} | GANHO")
+    print("-" * 56)
+    for op in before:
+        print(f"{op:<16} | {before[op]:>11.0f} | {after[op]:>11.0f} | {after[op] / before[op]:.1f}x")
+
+    batch = run_transaction(os.path.join(tmp, "pooled.db"), args.rows)
+    print("-" * 56)
+    print(f"{'insert em lote':<16} | {'':>11} | {batch:>11.0f} | (db.transaction)")
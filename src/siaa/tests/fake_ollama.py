@@ -0,0 +1,259 @@
+"""
+tests/fake_ollama.py
+
+Stand-in local do Ollama para medir o bot sem modelo nenhum.
+Implementa o suficiente da API para o MemoryManager:
+
+  POST /api/generate  → stream ou não, 'format' (JSON schema), 'context'
+  POST /api/embed     → embeddings determinísticos (hash das palavras:
+                        textos com palavras em comum ficam próximos);
+                        modelo fora de --embed-models responde 404, como
+                        o Ollama sem o modelo instalado
+  GET  /api/tags      → health check do LLMRouter
+
+A latência é simulada com o mesmo modelo de custo do Ollama:
+  load (1ª chamada por modelo) + prompt_eval (tokens do prompt / taxa)
+  + eval (tokens gerados / taxa). Os campos de tempo da resposta
+  (load_duration, prompt_eval_count, ...) seguem o formato real, em ns.
+
+Respostas: com 'format' o schema é preenchido com valores plausíveis;
+sem ele, a primeira regra de --responses (JSON {"trecho do prompt":
+"resposta"}) que casar com o prompt, senão um texto de preenchimento.
+
+Execute a partir da raiz src/siaa/:
+    python3 tests/fake_ollama.py --port 11435 --token-rate 25
+e aponte OLLAMA_URL=http://localhost:11435 para ele.
+"""
+
+import argparse
+import json
+import math
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_CHARS_PER_TOKEN = 4
+
+
+class FakeOllamaConfig:
+    def __init__(
+        self,
+        load_time: float = 2.0,
+        prompt_rate: float = 300.0,
+        token_rate: float = 20.0,
+        eval_tokens: int = 30,
+        time_scale: float = 1.0,
+        responses: dict | None = None,
+        embed_models: set | None = None,
+        embed_dim: int = 64,
+    ):
+        self.load_time    = load_time     # s para "carregar" um modelo frio
+        self.prompt_rate  = prompt_rate   # tokens/s avaliando o prompt (e embeddings)
+        self.token_rate   = token_rate    # tokens/s gerando
+        self.eval_tokens  = eval_tokens   # tamanho das respostas livres
+        self.time_scale   = time_scale    # 0 = sem sleep (só contabiliza)
+        self.responses    = responses or {}
+        self.embed_models = {"nomic-embed-text"} if embed_models is None else set(embed_models)
+        self.embed_dim    = embed_dim
+
+        self.loaded   = set()
+        self.requests = 0
+        self.embeds   = 0
+        self.lock     = threading.Lock()
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // _CHARS_PER_TOKEN)
+
+
+def _fill_schema(schema: dict) -> dict:
+    """Valores plausíveis para cada propriedade do schema."""
+    out = {}
+    for field, spec in schema.get("properties", {}).items():
+        pattern = spec.get("pattern", "")
+        if "enum" in spec:
+            out[field] = spec["enum"][0]
+        elif spec.get("type") in ("number", "integer"):
+            out[field] = max(spec.get("minimum", 0), 10)
+        elif "HOJE" in pattern:
+            out[field] = "HOJE"
+        elif "SEM HORA" in pattern:
+            out[field] = "SEM HORA"
+        elif spec.get("type") == "boolean":
+            out[field] = False
+        else:
+            out[field] = "teste"
+    return out
+
+
+def _embedding(text: str, dim: int) -> list[float]:
+    """Bag of words com hashing: cada palavra soma ±1 numa dimensão."""
+    vec = [0.0] * dim
+    for word in re.findall(r"\w+", text.lower()):
+        h = zlib.crc32(word.encode("utf-8"))
+        vec[h % dim] += 1.0 if (h >> 16) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def _reply_for(cfg: FakeOllamaConfig, body: dict) -> str:
+    if isinstance(body.get("format"), dict):
+        return json.dumps(_fill_schema(body["format"]), ensure_ascii=False)
+    if body.get("format") == "json":
+        return "{}"
+
+    prompt = body.get("prompt", "")
+    for needle, answer in cfg.responses.items():
+        if needle.lower() in prompt.lower():
+            return answer
+    return " ".join(["ok"] * cfg.eval_tokens)
+
+
+def make_handler(cfg: FakeOllamaConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, data: dict, status: int = 200):
+            raw = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                return self._json({"models": [{"name": m} for m in sorted(cfg.loaded)]})
+            self._json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            if self.path not in ("/api/generate", "/api/embed"):
+                return self._json({"error": "not found"}, 404)
+
+            body  = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/api/embed":
+                return self._embed(body)
+
+            model = body.get("model", "fake")
+            scale = cfg.time_scale
+
+            with cfg.lock:
+                cfg.requests += 1
+                cold = model not in cfg.loaded
+                cfg.loaded.add(model)
+            load = cfg.load_time if cold else 0.0
+
+            # Request sem prompt só carrega o modelo (preload/keep-warm)
+            if not body.get("prompt"):
+                time.sleep(load * scale)
+                return self._json({"model": model, "response": "", "done": True,
+                                   "load_duration": int(load * 1e9)})
+
+            prompt_tokens = _tokens(body["prompt"])
+            reply         = _reply_for(cfg, body)
+            words         = reply.split(" ")
+            prompt_eval   = prompt_tokens / cfg.prompt_rate
+            eval_time     = len(words) / cfg.token_rate
+            context       = list(body.get("context") or []) + list(range(prompt_tokens + len(words)))
+
+            final = {
+                "model":                model,
+                "done":                 True,
+                "context":              context,
+                "load_duration":        int(load * 1e9),
+                "prompt_eval_count":    prompt_tokens,
+                "prompt_eval_duration": int(prompt_eval * 1e9),
+                "eval_count":           len(words),
+                "eval_duration":        int(eval_time * 1e9),
+                "total_duration":       int((load + prompt_eval + eval_time) * 1e9),
+            }
+            time.sleep((load + prompt_eval) * scale)
+
+            if body.get("stream") is False:
+                time.sleep(eval_time * scale)
+                return self._json(dict(final, response=reply))
+
+            # Streaming NDJSON: um chunk por palavra, no ritmo de token_rate
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for i, word in enumerate(words):
+                    piece = word if i == 0 else f" {word}"
+                    self._chunk({"model": model, "response": piece, "done": False})
+                    time.sleep(scale / cfg.token_rate)
+                self._chunk(dict(final, response=""))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # cliente abortou o stream — comportamento esperado
+
+        def _embed(self, body: dict):
+            model = body.get("model", "")
+            if model.split(":")[0] not in cfg.embed_models:
+                return self._json({"error": f'model "{model}" not found, try pulling it first'}, 404)
+
+            texts = body.get("input", [])
+            texts = [texts] if isinstance(texts, str) else texts
+            with cfg.lock:
+                cfg.embeds += 1
+            tokens = sum(_tokens(t) for t in texts)
+            time.sleep(tokens / cfg.prompt_rate * cfg.time_scale)
+            self._json({
+                "model":             model,
+                "embeddings":        [_embedding(t, cfg.embed_dim) for t in texts],
+                "prompt_eval_count": tokens,
+                "total_duration":    int(tokens / cfg.prompt_rate * 1e9),
+            })
+
+        def _chunk(self, data: dict):
+            raw = json.dumps(data).encode() + b"\n"
+            self.wfile.write(f"{len(raw):x}\r\n".encode() + raw + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def start_server(cfg: FakeOllamaConfig, port: int = 0) -> ThreadingHTTPServer:
+    """Sobe o servidor em thread daemon. port=0 escolhe uma porta livre."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(cfg))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in local do Ollama")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--load-time", type=float, default=2.0)
+    parser.add_argument("--prompt-rate", type=float, default=300.0)
+    parser.add_argument("--token-rate", type=float, default=20.0)
+    parser.add_argument("--eval-tokens", type=int, default=30)
+    parser.add_argument("--responses", help="JSON {trecho do prompt: resposta}")
+    parser.add_argument("--embed-models", default="nomic-embed-text",
+                        help="modelos de embedding 'instalados' (vírgula; vazio = nenhum)")
+    args = parser.parse_args()
+
+    responses = {}
+    if args.responses:
+        with open(args.responses, "r", encoding="utf-8") as f:
+            responses = json.load(f)
+
+    cfg = FakeOllamaConfig(
+        load_time=args.load_time, prompt_rate=args.prompt_rate,
+        token_rate=args.token_rate, eval_tokens=args.eval_tokens,
+        responses=responses,
+        embed_models={m for m in args.embed_models.split(",") if m},
+    )
+    server = start_server(cfg, args.port)
+    print(f"🤖 Fake Ollama em http://127.0.0.1:{server.server_port} (Ctrl+C para sair)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,73 @@
+"""
+tests/test_br_parser.py
+
+Confere as datas que o parser determinístico (framework/br_parser) devolve
+para frases de gasto e de compromisso, com um "agora" fixo.
+Gasto fala do passado ("dia 10" = o último dia 10); compromisso fala do
+futuro ("dia 10" = o próximo dia 10). Na agenda confere também o título
+que sobra depois de tirar data e hora.
+Execute a partir da raiz src/siaa/:
+    python3 tests/test_br_parser.py
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Garante que src/siaa/ está no path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from framework.br_parser import parse_agenda, parse_finance
+
+# Domingo, 18/10/2026, 09:00
+NOW = datetime(2026, 10, 18, 9, 0)
+
+FINANCE_SAMPLES = [
+    # (frase, valor, data)
+    ("gastei 50 no mercado dia 10",        50.0,   "10/10/2026"),
+    ("gastei 40 na quinta no mercado",     40.0,   "15/10/2026"),
+    ("paguei 1.500,00 de aluguel dia 5",   1500.0, "05/10/2026"),
+    ("gastei 12,50 no café dia 25",        12.5,   "25/09/2026"),
+    ("gastei 30 ontem na farmácia",        30.0,   "17/10/2026"),
+    ("paguei 80 de luz em 03/10",          80.0,   "03/10/2026"),
+    ("almoço 35 reais",                    35.0,   "18/10/2026"),
+]
+
+AGENDA_SAMPLES = [
+    # (frase, data, hora, título)
+    ("dentista quinta às 10h",                     "22/10/2026", "10:00", "Dentista"),
+    ("reunião dia 10 às 14h",                      "10/11/2026", "14:00", "Reunião"),
+    ("academia dia 25 às 7h",                      "25/10/2026", "07:00", "Academia"),
+    ("consulta amanhã às 9h",                      "19/10/2026", "09:00", "Consulta"),
+    ("médico em 05/11 às 15h",                     "05/11/2026", "15:00", "Médico"),
+    ("marca dentista pra mim segunda que vem 10h", "26/10/2026", "10:00", "Dentista"),
+    ("call sexta às 3 da tarde",                   "23/10/2026", "15:00", "Call"),
+]
+
+
+def run_test() -> int:
+    failures = 0
+
+    print(f"\n🚀 --- TESTE parse_finance (agora = {NOW:%d/%m/%Y %H:%M}) --- 🚀")
+    for phrase, amount, date in FINANCE_SAMPLES:
+        got = parse_finance(phrase, NOW)
+        ok  = got["amount"] == amount and got["date"] == date
+        failures += not ok
+        status = "✅ OK" if ok else f"❌ ERRADO (Era: {amount} em {date})"
+        print(f"{phrase:<36} | {got['amount']} em {got['date']} | {status}")
+
+    print(f"\n🚀 --- TESTE parse_agenda (agora = {NOW:%d/%m/%Y %H:%M}) --- 🚀")
+    for phrase, date, time_, title in AGENDA_SAMPLES:
+        got = parse_agenda(phrase, NOW)
+        ok  = got["date"] == date and got["time"] == time_ and got["title"] == title
+        failures += not ok
+        status = "✅ OK" if ok else f"❌ ERRADO (Era: {title!r} {date} {time_})"
+        print(f"{phrase:<44} | {got['title']!r} {got['date']} {got['time']} | {status}")
+
+    total = len(FINANCE_SAMPLES) + len(AGENDA_SAMPLES)
+    print(f"\n📊 {total - failures}/{total} corretos")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_test() else 0)
@@ -0,0 +1,47 @@
+"""
+tests/test_near_duplicates.py
+
+Confere o limiar do framework/near_duplicates: paráfrases do mesmo fato
+se fundem no dedupe, fatos diferentes sobre o mesmo assunto não.
+Execute a partir da raiz src/siaa/:
+    python3 tests/test_near_duplicates.py
+"""
+
+import os
+import sys
+
+# Garante que src/siaa/ está no path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from framework.near_duplicates import DEFAULT_THRESHOLD, dedupe, signature, similarity
+
+SAMPLES = [
+    # (fato antigo, fato novo, deve fundir)
+    ("[17/10] Usuário gosta de café",              "[18/10] O usuário gosta muito de café",       True),
+    ("[17/10] Usuário prefere reuniões de manhã",  "[18/10] O usuário prefere reuniões pela manhã", True),
+    ("[17/10] Usuário gosta de café",              "[18/10] Usuário gosta de chá",                False),
+    ("[17/10] Usuário gosta de café",              "[18/10] Usuário odeia café",                  False),
+    ("[17/10] Usuário mora no Rio",                "[18/10] Usuário mora em São Paulo",           False),
+    ("[17/10] Usuário marcou dentista para sexta", "[18/10] Usuário marcou médico para sexta",    False),
+    ("[17/10] Usuário está aprendendo Python",     "[18/10] Usuário está aprendendo Rust",        False),
+]
+
+
+def run_test() -> int:
+    failures = 0
+
+    print(f"\n🚀 --- TESTE near_duplicates (limiar {DEFAULT_THRESHOLD}) --- 🚀")
+    for old, new, merge in SAMPLES:
+        score  = similarity(signature(old), signature(new))
+        merged = dedupe([old, new]) == [new]
+        ok     = merged == merge
+        failures += not ok
+        status = "✅ OK" if ok else f"❌ ERRADO (Era: {'fundir' if merge else 'manter'})"
+        print(f"{old[8:]:<34} ~ {new[8:]:<38} | {score:.2f} | {status}")
+
+    print(f"\n📊 {len(SAMPLES) - failures}/{len(SAMPLES)} corretos")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_test() else 0)